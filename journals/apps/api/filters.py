@@ -1,6 +1,8 @@
 '''Filter class for Journals'''
+from django.db.models import OuterRef, Subquery
 from django_filters import rest_framework as filters
 from rest_framework.filters import BaseFilterBackend
+from wagtail.wagtailcore.models import Page
 
 from journals.apps.journals.models import JournalAccess, JournalPage, UserPageVisit, Video
 
@@ -39,16 +41,14 @@ class JournalAccessFilter(filters.FilterSet):
         if not value:
             return queryset
 
-        users = set(queryset.values_list('user', flat=True))
-        filtered_uuids = []
-        for user in users:
-            user_queryset = queryset.filter(user=user)
-            current_user_journals = set(user_queryset.values_list('journal', flat=True))
-            for journal in current_user_journals:
-                journal_queryset = user_queryset.filter(journal=journal)
-                filtered_uuids.append(journal_queryset.order_by('-expiration_date').first().uuid)
+        # the latest record of each user-journal pair is picked by a correlated subquery, so the whole
+        # filter is a single query whatever the number of users and journals
+        latest_uuid = queryset.filter(
+            user=OuterRef('user'),
+            journal=OuterRef('journal')
+        ).order_by('-expiration_date', '-id').values('uuid')[:1]
 
-        filtered_queryset = queryset.filter(uuid__in=filtered_uuids)
+        filtered_queryset = queryset.filter(uuid=Subquery(latest_uuid))
         return filtered_queryset
 
     def filter_xblock_id(self, queryset, name, value):  # pylint: disable=unused-argument
@@ -59,9 +59,12 @@ class JournalAccessFilter(filters.FilterSet):
             return queryset
         qs = queryset
         try:
-            journal_pages = JournalPage.objects.filter(videos=Video.objects.get(block_id=value)).distinct().live()
-            journal_uuids = [journal_page.get_journal().uuid for journal_page in journal_pages]
-            qs = queryset.filter(journal__uuid__in=journal_uuids)
+            video = Video.objects.get(block_id=value)
+            # filter on the journal foreign key rather than joining on the journal's uuid
+            journal_ids = JournalPage.objects.live().filter(videos=video).values_list(
+                'journal_about_page__journal_id', flat=True
+            )
+            qs = queryset.filter(journal_id__in=list(journal_ids))
         except Video.DoesNotExist:
             pass
         return qs
@@ -105,18 +108,18 @@ class PageAuthorizationFilter(BaseFilterBackend):
     Filter that only allows user to see pages they have access to.
     """
     def filter_queryset(self, request, queryset, view):
-        # TODO: Currently has additional DB calls for gettings authorized journals and authorized pages attached to
-        # the journals. This happens on every API call
         authorized_journal_ids = JournalAccess.get_user_accessible_journal_ids(request.user)
 
-        authorized_journal_page_ids = JournalPage.objects.filter(
-            journal_about_page__journal__id__in=authorized_journal_ids
-        ).values_list('id', flat=True)
+        # authorize JournalPages by joining on their journal rather than listing authorized page ids
+        if issubclass(queryset.model, JournalPage):
+            return queryset.filter(journal_about_page__journal_id__in=authorized_journal_ids)
+        if queryset.model is not Page:
+            return queryset
 
         authorized_pages = (
             queryset.not_type(JournalPage) |
             queryset.type(JournalPage).filter(
-                id__in=authorized_journal_page_ids
+                journalpage__journal_about_page__journal_id__in=authorized_journal_ids
             )
         )
 
@@ -1,5 +1,6 @@
 """ Journal serializers """
 
+from django.db import models
 from rest_framework import serializers
 
 from journals.apps.core.models import User
@@ -40,6 +41,24 @@ class JournalSerializer(serializers.ModelSerializer):
         )
 
 
+class JournalAccessListSerializer(serializers.ListSerializer):
+    """
+    List serializer for the ``JournalAccess`` model, resolving the card image urls of the journals' about pages
+    in bulk instead of one by one.
+    """
+
+    def to_representation(self, data):
+        data = list(data.all() if isinstance(data, models.Manager) else data)
+        JournalAboutPage.prefetch_card_image_urls(
+            journal_access.journal.journalaboutpage for journal_access in data
+            if hasattr(journal_access.journal, 'journalaboutpage')
+        )
+        return super(JournalAccessListSerializer, self).to_representation(data)
+
+    def update(self, instance, validated_data):
+        pass
+
+
 class JournalAccessSerializer(serializers.ModelSerializer):
     """
     Serializer for the ``JournalAccess`` model.
@@ -48,6 +67,7 @@ class JournalAccessSerializer(serializers.ModelSerializer):
     user = serializers.SlugRelatedField(slug_field='username', queryset=User.objects.all())
 
     class Meta(object):
+        list_serializer_class = JournalAccessListSerializer
         model = JournalAccess
         fields = (
             'uuid',
@@ -57,6 +77,39 @@ class JournalAccessSerializer(serializers.ModelSerializer):
         )
 
 
+class JournalAccessGrantSerializer(serializers.Serializer):
+    """
+    Serializer for an entry of a bulk grant of JournalAccess, journal is the uuid of the journal. Journals
+    and users that don't exist are reported per entry by JournalAccess.bulk_grant_journal_access.
+    """
+    user = serializers.CharField()
+    journal = serializers.CharField()
+    order_number = serializers.CharField(
+        max_length=JournalAccess._meta.get_field('order_number').max_length,
+        required=False,
+        allow_null=True
+    )
+
+    def create(self, validated_data):
+        pass
+
+    def update(self, instance, validated_data):
+        pass
+
+
+class JournalAccessBulkGrantSerializer(serializers.Serializer):
+    """
+    Serializer for the body of a bulk grant of JournalAccess
+    """
+    grants = JournalAccessGrantSerializer(many=True)
+
+    def create(self, validated_data):
+        pass
+
+    def update(self, instance, validated_data):
+        pass
+
+
 class UserPageVisitSerializer(serializers.ModelSerializer):
     """
     Serializer for the "UserPageVisit" model.
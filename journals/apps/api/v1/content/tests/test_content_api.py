@@ -1,23 +1,49 @@
 """ Test Cases for /api/v1/content/ APIs """
 import datetime
+import gzip
 import json
+import uuid
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
 from django.urls import reverse
+from mock import PropertyMock, patch
 from wagtail.wagtailcore.models import Site
 
+from journals.apps.api.v1.content.views import JournalPagesAPIEndpoint
 from journals.apps.core.tests.factories import (
-    JournalFactory,
+    DocumentFactory,
+    ImageFactory,
+    ImageRenditionFactory,
     JournalAccessFactory,
+    JournalFactory,
     OrganizationFactory,
+    SiteConfigurationFactory,
     UserFactory,
-    USER_PASSWORD
+    USER_PASSWORD,
 )
 from journals.apps.core.tests.utils import (
     TEST_JOURNAL_STRUCTURE,
+    JournalTestCase,
+    capture_on_commit_callbacks,
     create_journal_about_page_factory,
     is_nested_json_equivalent
 )
+from journals.apps.journals.blocks import (
+    IMAGE_BLOCK_TYPE,
+    PDF_BLOCK_TYPE,
+    PRERENDER_HOSTNAME,
+    PRERENDER_SITE_ROOT_URL,
+    RICH_TEXT_BLOCK_TYPE,
+)
+from journals.apps.journals.handlers import build_journal_bundle, rerender_pages_showing
+from journals.apps.journals.models import (
+    JournalAboutPage,
+    JournalAccess,
+    JournalDocument,
+    JournalPage,
+    JournalStructure,
+)
 
 
 class TestContentPagesAPI(TestCase):
@@ -100,3 +126,344 @@ class TestContentPagesAPI(TestCase):
 
         page_json = response_json['items'][0]
         self.assertTrue(is_nested_json_equivalent(page_json, self.journal_test_data))
+
+
+class TestJournalPagesAPIEndpoint(JournalTestCase):
+    """
+    Test Cases for JournalPagesAPIEndpoint
+    """
+
+    def setUp(self):
+        super(TestJournalPagesAPIEndpoint, self).setUp()
+        cache.clear()
+        self.user = UserFactory()
+        self.site_configuration = SiteConfigurationFactory(site=self.site)
+        self.journal_access = JournalAccessFactory(
+            user=self.user,
+            journal=self.journal,
+            expiration_date=datetime.date.today() + datetime.timedelta(days=1)
+        )
+        self.page = JournalPage.objects.get(title='test_page_1_a_ii')
+        self.path = '/api/v1/content/pages/{page_id}/'.format(page_id=self.page.id)
+        self.client.login(username=self.user.username, password=USER_PASSWORD)
+
+    def _get_page(self):
+        response = self.client.get(self.path)
+        return response.status_code, json.loads(response.content.decode('utf-8'))
+
+    @patch.object(
+        JournalPagesAPIEndpoint, 'get_serializer', autospec=True, side_effect=JournalPagesAPIEndpoint.get_serializer
+    )
+    def test_detail_response_is_cached(self, mock_get_serializer):
+        """ Readers of an unchanged page share one serialization """
+        first_status, first_data = self._get_page()
+        second_status, second_data = self._get_page()
+
+        self.assertEqual((first_status, second_status), (200, 200))
+        self.assertEqual(first_data, second_data)
+        self.assertEqual(mock_get_serializer.call_count, 1)
+
+    @patch.object(
+        JournalPagesAPIEndpoint, 'get_serializer', autospec=True, side_effect=JournalPagesAPIEndpoint.get_serializer
+    )
+    def test_not_modified_when_etag_matches(self, mock_get_serializer):
+        """ Clients sending back a current ETag get a 304, a new one once the page is republished """
+        response = self.client.get(self.path)
+        etag = response['ETag']
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(mock_get_serializer.call_count, 1)
+
+        self.page.save_revision().publish()
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        with capture_on_commit_callbacks():
+            self.journal_access.revoked = True
+            self.journal_access.save()
+        self.assertEqual(self.client.get(self.path, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 404)
+
+    @patch.object(JournalAboutPage, '_get_journal_from_discovery', return_value={'sku': 'SKU-1', 'price': '10.00'})
+    @patch.object(
+        JournalPagesAPIEndpoint, 'get_serializer', autospec=True, side_effect=JournalPagesAPIEndpoint.get_serializer
+    )
+    def test_about_page_not_modified_when_etag_matches(self, mock_get_serializer, mock_get_journal_from_discovery):
+        """ Clients sending back a current ETag of the journal structure get a 304, a new one once it changes """
+        self.site_configuration.ecommerce_public_url_root = 'https://ecommerce.example.com'
+        self.site_configuration.save()
+        path = '/api/v1/content/pages/{page_id}/'.format(page_id=self.journal_about_page.id)
+        response = self.client.get(path)
+        etag = response['ETag']
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(mock_get_serializer.call_count, 1)
+
+        JournalPage.objects.get(title='test_page_2').unpublish()
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        mock_get_journal_from_discovery.return_value = {'sku': 'SKU-1', 'price': '20.00'}
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        self.journal.organization.name = 'renamed organization'
+        self.journal.organization.save()
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        with patch.object(JournalAboutPage, 'card_image_url', new_callable=PropertyMock, return_value='/card.jpg'):
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_page_without_about_page_not_cached(self):
+        """ Pages outside of a journal are served without being cached """
+        orphan_page = self.site.root_page.add_child(instance=JournalPage(title='orphan page', slug='orphan-page'))
+        self.assertIsNone(orphan_page.get_journal_about_page())
+        with patch.object(JournalPagesAPIEndpoint, 'get_object', return_value=orphan_page):
+            response = self.client.get('/api/v1/content/pages/{page_id}/'.format(page_id=orphan_page.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content.decode('utf-8'))['title'], 'orphan page')
+        self.assertNotIn('ETag', response)
+
+    def test_cache_invalidated_on_publish(self):
+        """ Republishing the page or its neighbours invalidates the cached response """
+        next_page = JournalPage.objects.get(title='test_page_1_b')
+        self.assertEqual(self._get_page()[1]['next_page_id'], next_page.id)
+
+        self.page.title = 'test_page_1_a_ii_renamed'
+        self.page.save_revision().publish()
+        self.assertEqual(self._get_page()[1]['title'], 'test_page_1_a_ii_renamed')
+
+        next_page.unpublish()
+        self.assertEqual(self._get_page()[1]['next_page_id'], JournalPage.objects.get(title='test_page_2').id)
+
+    def test_access_checked_on_every_request(self):
+        """ Cached responses are not served to users whose access was revoked """
+        self.assertEqual(self._get_page()[0], 200)
+
+        with capture_on_commit_callbacks():
+            self.journal_access.revoked = True
+            self.journal_access.save()
+        self.assertEqual(self._get_page()[0], 404)
+
+    def test_listing_only_returns_authorized_journal_pages(self):
+        """ Journal pages of journals the user has no access to are filtered out of listings """
+        listing_path = '/api/v1/content/pages/'
+        journal_page_count = JournalPage.objects.live().count()
+
+        response = self.client.get(listing_path, {'type': 'journals.JournalPage'})
+        self.assertEqual(json.loads(response.content.decode('utf-8'))['meta']['total_count'], journal_page_count)
+
+        other_user = UserFactory()
+        self.client.login(username=other_user.username, password=USER_PASSWORD)
+        response = self.client.get(listing_path, {'type': 'journals.JournalPage'})
+        self.assertEqual(json.loads(response.content.decode('utf-8'))['meta']['total_count'], 0)
+
+        response = self.client.get(listing_path)
+        titles = [item['title'] for item in json.loads(response.content.decode('utf-8'))['items']]
+        self.assertIn(self.journal_about_page.title, titles)
+        self.assertNotIn(self.page.title, titles)
+
+    def test_accessible_journals_cached_across_requests(self):
+        """ User's accessible journals are read once and dropped when their grants change """
+        self.assertEqual(JournalAccess.get_user_accessible_journal_ids(self.user), [self.journal.id])
+        with self.assertNumQueries(0):
+            self.assertEqual(JournalAccess.get_user_accessible_journal_ids(self.user), [self.journal.id])
+
+        with capture_on_commit_callbacks():
+            self.journal_access.revoked = True
+            self.journal_access.save()
+        self.assertEqual(JournalAccess.get_user_accessible_journal_ids(self.user), [])
+
+        other_journal = JournalFactory(organization=self.org, uuid=uuid.uuid4())
+        with capture_on_commit_callbacks():
+            JournalAccess.bulk_create_journal_access({self.user.username}, other_journal)
+        self.assertEqual(JournalAccess.get_user_accessible_journal_ids(self.user), [other_journal.id])
+
+    def test_accessible_journals_invalidated_once_committed(self):
+        """ Cached journals are only dropped once the revocation is committed """
+        self.assertEqual(JournalAccess.get_user_accessible_journal_ids(self.user), [self.journal.id])
+
+        with capture_on_commit_callbacks(execute=False) as callbacks:
+            self.journal_access.revoked = True
+            self.journal_access.save()
+        self.assertEqual(JournalAccess.get_user_accessible_journal_ids(self.user), [self.journal.id])
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(JournalAccess.get_user_accessible_journal_ids(self.user), [])
+
+    @patch('journals.apps.journals.models.TieredCache.set_all_tiers')
+    def test_accessible_journals_cached_until_earliest_expiration(self, mock_set_all_tiers):
+        """ Accessible journals are not cached past the end of the day the earliest grant expires """
+        JournalAccessFactory(
+            uuid=uuid.uuid4(),
+            user=self.user,
+            journal=JournalFactory(organization=self.org, uuid=uuid.uuid4()),
+            expiration_date=datetime.date.today() + datetime.timedelta(days=30)
+        )
+        JournalAccess.get_user_accessible_journal_ids(self.user)
+
+        timeout = mock_set_all_tiers.call_args[0][2]
+        end_of_expiration_date = datetime.datetime.combine(
+            self.journal_access.expiration_date + datetime.timedelta(days=1), datetime.time.min
+        )
+        self.assertLessEqual(timeout, (end_of_expiration_date - datetime.datetime.now()).total_seconds() + 1)
+        self.assertGreater(timeout, 0)
+
+    def test_body_prerendered_on_publish(self):
+        """ Body payload is rendered on publish and only has its urls filled in on read """
+        image = ImageFactory()
+        ImageRenditionFactory(image=image)
+        document = DocumentFactory()
+        self.page.body = json.dumps([
+            {
+                'type': RICH_TEXT_BLOCK_TYPE,
+                'value': '<p><a linktype="document" id="{}">doc</a><a linktype="page" id="{}">page</a></p>'.format(
+                    document.id, self.journal_about_page.id
+                )
+            },
+            {'type': IMAGE_BLOCK_TYPE, 'value': {'image': image.id, 'title': '', 'caption': ''}},
+            {'type': PDF_BLOCK_TYPE, 'value': {'doc': document.id, 'title': ''}},
+        ])
+        self.page.save_revision().publish()
+
+        page = JournalPage.objects.get(id=self.page.id)
+        self.assertTrue(page.has_current_rendered_body())
+        rendered_body = json.dumps(page.rendered_body)
+        self.assertIn(PRERENDER_HOSTNAME, rendered_body)
+        self.assertIn(PRERENDER_SITE_ROOT_URL, rendered_body)
+
+        request = RequestFactory().get('/')
+        request.site = self.site
+        with self.assertNumQueries(0):
+            body = page.get_body_api_representation(request)
+
+        page.rendered_body = None
+        self.assertEqual(body, page.get_body_api_representation(request))
+        self.assertEqual(self._get_page()[1]['body'], body)
+        self.assertNotIn('.invalid', json.dumps(body))
+
+    @patch('journals.apps.journals.handlers.run_in_background')
+    def test_body_rerendered_in_background_on_document_change(self, mock_run_in_background):
+        """
+        Only saves changing a field shown in the body render the pages showing a document again, their
+        outdated bodies are dropped right away in case the background render is lost
+        """
+        document = DocumentFactory()
+        self.page.body = json.dumps([{'type': PDF_BLOCK_TYPE, 'value': {'doc': document.id, 'title': ''}}])
+        self.page.save_revision().publish()
+        mock_run_in_background.reset_mock()
+
+        document.save()
+        document.save(update_fields=['collection'])
+        self.assertFalse(mock_run_in_background.called)
+
+        self._get_page()
+        document.title = 'renamed document'
+        document.save()
+        mock_run_in_background.assert_called_once_with(rerender_pages_showing, JournalDocument, document.id)
+        page = JournalPage.objects.get(id=self.page.id)
+        self.assertIsNone(page.rendered_body)
+        self.assertIn('renamed document', json.dumps(self._get_page()[1]['body']))
+
+        rerender_pages_showing(JournalDocument, document.id)
+        self.assertIn('renamed document', json.dumps(JournalPage.objects.get(id=self.page.id).rendered_body))
+
+
+class TestJournalBundleView(JournalTestCase):
+    """
+    Test Cases for JournalBundleView
+    """
+
+    def setUp(self):
+        super(TestJournalBundleView, self).setUp()
+        cache.clear()
+        self.user = UserFactory()
+        self.site_configuration = SiteConfigurationFactory(site=self.site)
+        JournalAccessFactory(
+            user=self.user,
+            journal=self.journal,
+            expiration_date=datetime.date.today() + datetime.timedelta(days=1)
+        )
+        self.path = reverse('api:v1:journal_bundle', kwargs={'journal_about_page_id': self.journal_about_page.id})
+        self.client.login(username=self.user.username, password=USER_PASSWORD)
+
+    def _get_bundle(self, **headers):
+        response = self.client.get(self.path, HTTP_ACCEPT_ENCODING='gzip', **headers)
+        if response.status_code != 200:
+            return response, None
+        return response, json.loads(gzip.decompress(response.content).decode('utf-8'))
+
+    def test_bundle_of_live_pages(self):
+        """ Bundle holds the structure and every live page of the journal with its navigation """
+        response, bundle = self._get_bundle()
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(bundle['structure'], self.journal_about_page.structure)
+
+        live_pages = list(JournalPage.objects.live().descendant_of(self.journal_about_page).order_by('path'))
+        self.assertEqual([page['id'] for page in bundle['pages']], [page.id for page in live_pages])
+        page = JournalPage.objects.get(title='test_page_1_a_ii')
+        page_data = next(item for item in bundle['pages'] if item['id'] == page.id)
+        self.assertEqual(page_data['next_page_id'], page.get_next_page().id)
+        self.assertEqual(page_data['bread_crumbs'], page.get_bread_crumbs())
+
+        response = self.client.get(self.path)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(json.loads(response.content.decode('utf-8')), bundle)
+
+    def test_bundle_cached_until_publish(self):
+        """ Bundle is built once, answered with a 304 while current and rebuilt when a page is published """
+        response, _ = self._get_bundle()
+        with patch.object(JournalAboutPage, '_build_bundle') as mock_build_bundle:
+            self.assertEqual(self._get_bundle(HTTP_IF_NONE_MATCH=response['ETag'])[0].status_code, 304)
+            self.assertEqual(self._get_bundle()[0].status_code, 200)
+            self.assertFalse(mock_build_bundle.called)
+
+        page = JournalPage.objects.get(title='test_page_1_a_ii')
+        page.title = 'test_page_1_a_ii_renamed'
+        page.save_revision().publish()
+        response, bundle = self._get_bundle(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('test_page_1_a_ii_renamed', [item['title'] for item in bundle['pages']])
+
+    def test_access_checked(self):
+        """ Users without access to the journal get a 404 """
+        self.client.login(username=UserFactory().username, password=USER_PASSWORD)
+        self.assertEqual(self._get_bundle()[0].status_code, 404)
+
+    def test_bundle_of_pages_without_rendered_body(self):
+        """ Pages whose body wasn't rendered on publish are bundled with their live body """
+        page = JournalPage.objects.get(title='test_page_1_a_ii')
+        JournalPage.objects.filter(id=page.id).update(rendered_body=None)
+        with patch.object(JournalPage, 'prerender_body'):
+            _, bundle = self._get_bundle()
+        page_data = next(item for item in bundle['pages'] if item['id'] == page.id)
+        self.assertEqual(page_data['body'], page.body.stream_block.get_api_representation(page.body))
+
+    @patch('journals.apps.journals.handlers.run_in_background')
+    def test_bundle_built_in_background_on_publish(self, mock_run_in_background):
+        """ Publishing a page builds the bundle of its journal in the background """
+        page = JournalPage.objects.get(title='test_page_1_a_ii')
+        page.save_revision().publish()
+        snapshot = JournalStructure.objects.get(journal_about_page=self.journal_about_page)
+        mock_run_in_background.assert_called_once_with(build_journal_bundle, snapshot.id)
+
+        build_journal_bundle(snapshot.id)
+        with patch.object(JournalAboutPage, '_build_bundle') as mock_build_bundle:
+            self.assertEqual(self._get_bundle()[0].status_code, 200)
+            self.assertFalse(mock_build_bundle.called)
@@ -1,10 +1,25 @@
 """
-Overridden Wagtail API endpoints
+Overridden Wagtail API endpoints and whole journal bundles
 """
+import gzip
+
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from rest_framework import views
 from rest_framework.permissions import AllowAny
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 from wagtail.api.v2.endpoints import PagesAPIEndpoint
 
 from journals.apps.api.filters import PageAuthorizationFilter
+from journals.apps.journals.blocks import get_base_url, render_prerendered_stream
+from journals.apps.journals.models import JournalAboutPage, JournalAccess, JournalPage, JournalStructure
+from journals.apps.journals.utils import get_cache_key, get_page_response_cache_generation
+
+PAGE_RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
 
 
 class JournalPagesAPIEndpoint(PagesAPIEndpoint):
@@ -17,3 +32,118 @@ class JournalPagesAPIEndpoint(PagesAPIEndpoint):
 
     permission_classes = (AllowAny, )
     filter_backends = [PageAuthorizationFilter] + PagesAPIEndpoint.filter_backends
+
+    def detail_view(self, request, pk):
+        """
+        Serialized journal pages are shared by every reader until the page or its journal is
+        published or unpublished again. get_object applies PageAuthorizationFilter, so access
+        is still checked on every request.
+
+        The cache key doubles as the ETag of the response, a client sending it back in If-None-Match
+        gets a 304 without the page being serialized or read from the cache.
+        """
+        instance = self.get_object()
+        if isinstance(instance, JournalAboutPage):
+            return self.about_page_detail_view(request, instance)
+
+        journal_about_page_id = None
+        if isinstance(instance, JournalPage):
+            journal_about_page_id = instance.journal_about_page_id
+            if journal_about_page_id is None:
+                journal_about_page = instance.get_journal_about_page()
+                journal_about_page_id = journal_about_page.id if journal_about_page else None
+        if journal_about_page_id is None:
+            # only pages of a journal are cached, their cached responses are dropped per journal
+            return Response(self.get_serializer(instance).data)
+
+        cache_key = get_cache_key(
+            page_id=instance.id,
+            live_revision_id=instance.live_revision_id,
+            last_published_at=instance.last_published_at,
+            generation=get_page_response_cache_generation(journal_about_page_id),
+            base_url=request.build_absolute_uri('/'),
+            site_id=request.site.id if request.site else None,
+            query=sorted(request.GET.lists()),
+        )
+        etag = quote_etag(cache_key)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            data = cache.get(cache_key)
+            if data is None:
+                data = self.get_serializer(instance).data
+                cache.set(cache_key, data, PAGE_RESPONSE_CACHE_TIMEOUT)
+            response = Response(data)
+        response['ETag'] = etag
+        return response
+
+    def about_page_detail_view(self, request, instance):
+        """
+        Journal about pages serve the structure of their journal, so their ETag changes whenever the page
+        is published again or the structure snapshot of the journal is rebuilt. Every field not stored in the
+        live revision is part of it too: the image rendition urls, the organization name, and the price and
+        purchase url read from the same discovery cache the serializer reads them from.
+        """
+        etag = quote_etag(get_cache_key(
+            resource='journal_about_page_response',
+            page_id=instance.id,
+            live_revision_id=instance.live_revision_id,
+            version=JournalStructure.get_for_about_page(instance).version,
+            card_image_url=instance.card_image_url,
+            hero_image_url=instance.hero_image_url,
+            organization=instance.organization,
+            access_length=instance.access_length,
+            price=instance.price,
+            purchase_url=instance.purchase_url,
+            base_url=request.build_absolute_uri('/'),
+            site_id=request.site.id if request.site else None,
+            query=sorted(request.GET.lists()),
+        ))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        response['ETag'] = etag
+        return response
+
+
+class JournalBundleView(views.APIView):
+    """
+    Returns every live page of a journal with its structure and navigation in a single gzipped response,
+    so readers can page through a journal, or read it offline, without a content API call per page.
+    """
+
+    def get(self, request, journal_about_page_id):
+        """
+        Responds with the bundle of the journal if the user has access to it. Bundles are compressed once per
+        structure version and base url and served from the cache, with the cache key as their ETag.
+        """
+        journal_about_page = get_object_or_404(JournalAboutPage.objects.live(), id=journal_about_page_id)
+        if journal_about_page.journal_id not in JournalAccess.get_user_accessible_journal_ids(request.user):
+            raise Http404
+
+        snapshot = JournalStructure.get_for_about_page(journal_about_page)
+        cache_key = get_cache_key(
+            resource='journal_bundle_response',
+            journal_about_page_id=journal_about_page.id,
+            version=snapshot.version,
+            generation=get_page_response_cache_generation(journal_about_page_id),
+            base_url=get_base_url(request),
+            site_root_url=request.site.root_url,
+        )
+        etag = quote_etag(cache_key)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content = cache.get(cache_key)
+            if content is None:
+                bundle = render_prerendered_stream(journal_about_page.get_bundle(snapshot), request)
+                content = gzip.compress(JSONRenderer().render(bundle))
+                cache.set(cache_key, content, PAGE_RESPONSE_CACHE_TIMEOUT)
+
+            if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+                response = HttpResponse(content, content_type='application/json')
+                response['Content-Encoding'] = 'gzip'
+            else:
+                response = HttpResponse(gzip.decompress(content), content_type='application/json')
+            patch_vary_headers(response, ('Accept-Encoding',))
+
+        response['ETag'] = etag
+        return response
@@ -25,15 +25,16 @@ class SearchHit(object):
     """
     This class encapsulates a SearchHit object
     """
-    def __init__(self, journal_page, component=None):
+    def __init__(self, journal_page, component=None, journal_about_page=None):
         """
         Args:
             journal_page: JournalPage that contains the search hit
             component: Specific object type that contains the hit (JournalImage, JournalDocument, Video)
             If none then hit is text found in the base JournalPage itself
+            journal_about_page: JournalAboutPage of journal_page if already known, saves resolving it per hit
         """
 
-        self._set_page_info(journal_page)
+        self._set_page_info(journal_page, journal_about_page)
 
         # Setup block information
         if component:
@@ -41,17 +42,29 @@ class SearchHit(object):
         else:
             self._set_type_info(journal_page)
 
-    def _set_page_info(self, journal_page):
+    def _set_page_info(self, journal_page, journal_about_page=None):
         """
         Set information about Page that hit was found on
         """
-        about_page = journal_page.get_journal_about_page()
+        about_page = journal_about_page or journal_page.get_journal_about_page()
         self.journal_about_page_id = about_page.id
-        self.journal_id = about_page.journal.id
+        self.journal_id = about_page.journal_id
         self.journal_name = about_page.title
         self.page_id = journal_page.id
         self.page_title = journal_page.title
-        self.breadcrumbs = journal_page.get_bread_crumbs(title_only=True)
+        self.journal_page = journal_page
+        self.breadcrumbs = []
+
+    @staticmethod
+    def set_bread_crumbs(hits):
+        """
+        Set breadcrumbs of all hits at once instead of resolving the ancestors of every hit's page
+        """
+        bread_crumbs = JournalPage.get_bread_crumbs_for_pages(
+            [hit.journal_page for hit in hits], title_only=True
+        )
+        for hit in hits:
+            hit.breadcrumbs = bread_crumbs.get(hit.page_id, [])
 
     def _set_type_info(self, component):
         """
@@ -24,6 +24,7 @@ from rest_framework.views import APIView
 
 from wagtail.wagtailsearch.models import Query
 
+from journals.apps.journals.journal_page_helper import get_specific_pages
 from journals.apps.journals.models import (
     JournalAboutPage,
     JournalAccess,
@@ -97,7 +98,13 @@ class SearchView(APIView):
                         'score'
                     )
 
-                    self._add_to_hit_list(hit_list, page_search_results, journal_page_ids=None, base_page=True)
+                    self._add_to_hit_list(
+                        hit_list,
+                        page_search_results,
+                        journal_page_ids=None,
+                        base_page=True,
+                        journal_about_page=about_page
+                    )
                     search_meta.text_count += page_search_results.count()
 
                 if search_filter == TYPE_ALL or search_filter == TYPE_DOCUMENT:
@@ -108,7 +115,13 @@ class SearchView(APIView):
                         JournalDocument
                     )
 
-                    self._add_to_hit_list(hit_list, doc_search_results, journal_page_ids, base_page=False)
+                    self._add_to_hit_list(
+                        hit_list,
+                        doc_search_results,
+                        journal_page_ids,
+                        base_page=False,
+                        journal_about_page=about_page
+                    )
                     search_meta.doc_count += doc_search_results.count()
 
                 if search_filter == TYPE_ALL or search_filter == TYPE_IMAGE:
@@ -119,7 +132,13 @@ class SearchView(APIView):
                         search_operator,
                         JournalImage
                     )
-                    self._add_to_hit_list(hit_list, image_search_results, journal_page_ids, base_page=False)
+                    self._add_to_hit_list(
+                        hit_list,
+                        image_search_results,
+                        journal_page_ids,
+                        base_page=False,
+                        journal_about_page=about_page
+                    )
                     search_meta.image_count += image_search_results.count()
 
                 if search_filter == TYPE_ALL or search_filter == TYPE_VIDEO:
@@ -130,13 +149,20 @@ class SearchView(APIView):
                         search_operator,
                         Video
                     )
-                    self._add_to_hit_list(hit_list, video_search_results, journal_page_ids, base_page=False)
+                    self._add_to_hit_list(
+                        hit_list,
+                        video_search_results,
+                        journal_page_ids,
+                        base_page=False,
+                        journal_about_page=about_page
+                    )
                     search_meta.video_count += video_search_results.count()
 
                 query = Query.get(clean_query)
                 query.add_hit()
 
             search_meta.total_count = len(hit_list)
+            SearchHit.set_bread_crumbs(hit_list)
 
         # return the list iterator in descending order with highest hit score first
         return SearchResults(search_meta, reversed(hit_list))
@@ -191,7 +217,7 @@ class SearchView(APIView):
 
         return journal_page_id_list, results
 
-    def _add_to_hit_list(self, results, search_results, journal_page_ids, base_page=True):
+    def _add_to_hit_list(self, results, search_results, journal_page_ids, base_page=True, journal_about_page=None):
         """
         Add search_results to result list in sorted order by 'score'
         Args:
@@ -199,23 +225,28 @@ class SearchView(APIView):
             search_results: QuerySet representing the search results
             journal_page_ids: list of page id's that contain component hits
             base_page: True if search_results are for journal_page
+            journal_about_page: JournalAboutPage the search_results were found under
         """
         for result in search_results:
             score = getattr(result, 'score', 0)
             position = bisect.bisect_left(results, score)
             if base_page:
-                results.insert(position, SearchHit(journal_page=result, component=None))
+                results.insert(position, SearchHit(
+                    journal_page=result, component=None, journal_about_page=journal_about_page
+                ))
             else:
                 # find the specific JournalPages (from filtered list) where the Component
                 # was found
                 journal_page_list = result.journalpage_set.filter(
                     id__in=journal_page_ids
                 ).only(
-                    'id', 'title', 'url_path'
+                    'id', 'title', 'url_path', 'path', 'depth', 'journal_about_page'
                 ).live().distinct()
 
                 for page in journal_page_list:
-                    results.insert(position, SearchHit(journal_page=page, component=result))
+                    results.insert(position, SearchHit(
+                        journal_page=page, component=result, journal_about_page=journal_about_page
+                    ))
 
     def _get_journals_for_user(self, request, journal_id=None):
         """
@@ -235,8 +266,8 @@ class SearchView(APIView):
                 about_pages.append(JournalAboutPage.objects.get(journal_id=journal_id))
         else:
             # get all live journals for the requested site that user has access to
-            about_pages = request.site.root_page.get_children().live().specific().filter(
+            about_pages = get_specific_pages(request.site.root_page.get_children().live().filter(
                 journalaboutpage__journal__id__in=journal_id_list
-            )
+            ))
 
         return about_pages
@@ -0,0 +1,348 @@
+""" Test Cases for the journal access API """
+
+import datetime
+import json
+import uuid
+
+from django.db import DatabaseError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from mock import patch
+from wagtail.wagtailcore.models import Site
+from wagtail.wagtailimages.tests.utils import get_test_image_file
+
+from journals.apps.api.filters import JournalAccessFilter
+from journals.apps.core.tests.factories import (
+    ImageFactory,
+    JournalAccessFactory,
+    JournalFactory,
+    OrganizationFactory,
+    UserFactory,
+    USER_PASSWORD,
+    VideoFactory,
+)
+from journals.apps.core.tests.utils import TEST_JOURNAL_STRUCTURE, create_journal_about_page_factory
+from journals.apps.journals.models import JournalAboutPage, JournalAccess, JournalPage, Video
+
+
+class TestJournalAccessFilter(TestCase):
+    """
+    Test Cases for JournalAccessFilter
+    """
+
+    def setUp(self):
+        super(TestJournalAccessFilter, self).setUp()
+        self.org = OrganizationFactory(site=Site.objects.first())
+        self.journals = [JournalFactory(organization=self.org, uuid=uuid.uuid4()) for _ in range(2)]
+        self.today = datetime.date.today()
+
+    def _create_grants(self, user_count):
+        """ Create an older and a newer grant for each user-journal pair, returns the newer ones """
+        latest = []
+        for user in UserFactory.create_batch(user_count):
+            for journal in self.journals:
+                for days in (10, 20):
+                    access = JournalAccessFactory(
+                        uuid=uuid.uuid4(),
+                        user=user,
+                        journal=journal,
+                        expiration_date=self.today + datetime.timedelta(days=days)
+                    )
+                latest.append(access.uuid)
+        return latest
+
+    def _filter_latest(self):
+        """ Returns the uuids of the latest access records and the number of queries it took to filter them """
+        with CaptureQueriesContext(connection) as queries:
+            uuids = [
+                access.uuid for access in
+                JournalAccessFilter({'get_latest': 'true'}, queryset=JournalAccess.objects.all()).qs
+            ]
+        return uuids, len(queries)
+
+    def test_filter_latest_single_query(self):
+        """ Latest grant of every user-journal pair is found with one query whatever the number of users """
+        latest = self._create_grants(user_count=2)
+        uuids, query_count = self._filter_latest()
+        self.assertEqual(set(uuids), set(latest))
+        self.assertEqual(query_count, 1)
+
+        latest += self._create_grants(user_count=10)
+        uuids, query_count = self._filter_latest()
+        self.assertEqual(set(uuids), set(latest))
+        self.assertEqual(query_count, 1)
+
+    def test_filter_latest_api(self):
+        """ Endpoint only returns the latest grant of a user for each journal """
+        latest = self._create_grants(user_count=1)
+        admin = UserFactory(is_staff=True)
+        self.client.login(username=admin.username, password=USER_PASSWORD)
+
+        response = self.client.get(reverse('api:v1:journalaccess-list'), {'get_latest': 'true'})
+        results = json.loads(response.content.decode('utf-8'))['results']
+        self.assertEqual({item['uuid'] for item in results}, {str(access_uuid) for access_uuid in latest})
+
+
+class TestJournalAccessQueryPlans(TestCase):
+    """
+    Test Cases asserting that the hot lookups of JournalAccess are served by their indexes
+    """
+
+    def setUp(self):
+        super(TestJournalAccessQueryPlans, self).setUp()
+        self.user = UserFactory()
+        self.journal = JournalFactory(organization=OrganizationFactory(site=Site.objects.first()), uuid=uuid.uuid4())
+
+    def _get_query_plan(self, queryset):
+        """ Returns the query plan of queryset as text, EXPLAIN syntax and output differ per database """
+        if connection.vendor == 'sqlite':
+            explain = 'EXPLAIN QUERY PLAN '
+        elif connection.vendor == 'mysql':
+            explain = 'EXPLAIN '
+        else:
+            self.skipTest('Query plans are only checked on SQLite and MySQL')
+
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(explain + sql, params)
+            return ' '.join(str(column) for row in cursor.fetchall() for column in row)
+
+    @staticmethod
+    def _get_index_name(model, columns):
+        """ Returns the name of the index on exactly columns of model's table """
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+        return next(
+            name for name, constraint in constraints.items()
+            if constraint['columns'] == columns and (constraint['index'] or constraint['unique'])
+        )
+
+    def test_active_access_uses_index(self):
+        """ Active grants of a user are looked up with the (user, revoked, expiration_date) index """
+        self.assertIn('journalaccess_active_idx', self._get_query_plan(
+            JournalAccess.get_active_access_for_user(self.user)
+        ))
+        self.assertIn('journalaccess_active_idx', self._get_query_plan(
+            JournalAccess.objects.filter(user=self.user, revoked=False, expiration_date__gte=datetime.date.today())
+        ))
+
+    def test_latest_access_uses_index(self):
+        """ Newest grant per user and journal is looked up with the (user, journal, expiration_date) index """
+        self.assertIn('journalaccess_latest_idx', self._get_query_plan(
+            JournalAccessFilter({'get_latest': 'true'}, queryset=JournalAccess.objects.all()).qs
+        ))
+
+    def test_order_number_lookup_uses_index(self):
+        """ Grants of an order are looked up with the order_number index """
+        self.assertIn('journalaccess_order_idx', self._get_query_plan(
+            JournalAccess.objects.filter(order_number='EDX-100001')
+        ))
+
+    def test_xblock_lookup_uses_indexes(self):
+        """
+        Grants of the journals showing a video are looked up with the video's block_id index, the index
+        of the pages showing a video and the journal foreign key index
+        """
+        journal_about_page = create_journal_about_page_factory(
+            self.journal, TEST_JOURNAL_STRUCTURE, Site.objects.first().root_page
+        )
+        video = VideoFactory(block_id='block-v1:edX+DemoX+Demo_Course+type@video+block@intro')
+        JournalPage.objects.child_of(journal_about_page).first().videos.add(video)
+
+        self.assertIn(self._get_index_name(Video, ['block_id']), self._get_query_plan(
+            Video.objects.filter(block_id=video.block_id)
+        ))
+        page_videos_model = JournalPage.videos.through  # pylint: disable=no-member
+        self.assertIn(self._get_index_name(page_videos_model, ['video_id']), self._get_query_plan(
+            JournalPage.objects.live().filter(videos=video).values_list('journal_about_page__journal_id', flat=True)
+        ))
+        self.assertIn(self._get_index_name(JournalAccess, ['journal_id']), self._get_query_plan(
+            JournalAccessFilter({'block_id': video.block_id}, queryset=JournalAccess.objects.all()).qs
+        ))
+
+
+class TestJournalAccessListing(TestCase):
+    """
+    Test Cases for the number of queries listing JournalAccess entries
+    """
+
+    def setUp(self):
+        super(TestJournalAccessListing, self).setUp()
+        self.site = Site.objects.first()
+        self.org = OrganizationFactory(site=self.site)
+        self.admin = UserFactory(is_staff=True)
+        self.client.login(username=self.admin.username, password=USER_PASSWORD)
+
+    def _create_grants(self, count):
+        """ Create grants of journals whose about page has a card image """
+        for _ in range(count):
+            journal = JournalFactory(organization=self.org, uuid=uuid.uuid4(), name=str(uuid.uuid4()))
+            card_image = ImageFactory(file=get_test_image_file())
+            card_image.get_rendition('original')
+            about_page = create_journal_about_page_factory(
+                journal, {'title': journal.name, 'structure': []}, self.site.root_page
+            )
+            about_page.card_image = card_image
+            about_page.save()
+            JournalAccessFactory(
+                uuid=uuid.uuid4(), user=UserFactory(), journal=journal, expiration_date=datetime.date.today()
+            )
+
+    def _list_grants(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('api:v1:journalaccess-list'))
+        return json.loads(response.content.decode('utf-8'))['results'], len(queries)
+
+    def test_listing_query_count(self):
+        """ Grants, their user, journal, organization, about page and card image urls take a fixed number of queries """
+        self._create_grants(1)
+        results, query_count = self._list_grants()
+        self.assertEqual(len(results), 1)
+        # site and site configuration of the request, session, user, count, grants with their relations
+        # and the renditions of the card images
+        self.assertEqual(query_count, 8)
+
+        self._create_grants(9)
+        results, query_count = self._list_grants()
+        self.assertEqual(len(results), 10)
+        self.assertEqual(query_count, 8)
+
+        for result in results:
+            about_page = JournalAboutPage.objects.get(id=result['journal']['journalaboutpage']['id'])
+            self.assertEqual(result['journal']['journalaboutpage']['card_image_absolute_url'],
+                             about_page.card_image_absolute_url)
+            self.assertEqual(result['journal']['organization'], self.org.name)
+
+
+class TestJournalAccessBulkGrant(TestCase):
+    """
+    Test Cases for the bulk grant action of JournalAccessViewSet
+    """
+
+    def setUp(self):
+        super(TestJournalAccessBulkGrant, self).setUp()
+        self.org = OrganizationFactory(site=Site.objects.first())
+        self.journals = [JournalFactory(organization=self.org, uuid=uuid.uuid4()) for _ in range(2)]
+        self.users = UserFactory.create_batch(3)
+        self.admin = UserFactory(is_staff=True)
+        self.path = reverse('api:v1:journalaccess-bulk-grant')
+        self.client.login(username=self.admin.username, password=USER_PASSWORD)
+
+    def _bulk_grant(self, grants):
+        response = self.client.post(self.path, json.dumps({'grants': grants}), content_type='application/json')
+        return response.status_code, json.loads(response.content.decode('utf-8'))
+
+    def test_bulk_grant(self):
+        """ Every valid entry is granted and the others get their reason in the results """
+        grants = [
+            {'user': user.username, 'journal': str(journal.uuid), 'order_number': 'ORDER-{}-{}'.format(user.id, index)}
+            for user in self.users for index, journal in enumerate(self.journals)
+        ] + [
+            {'user': 'unknown', 'journal': str(self.journals[0].uuid), 'order_number': 'ORDER-unknown-user'},
+            {'user': self.users[0].username, 'journal': 'not-a-uuid', 'order_number': 'ORDER-bad-journal'},
+        ]
+        # 9 queries plus the savepoint of the grants' transaction and its release
+        with self.assertNumQueries(11):
+            status_code, data = self._bulk_grant(grants)
+
+        self.assertEqual(status_code, 200)
+        self.assertEqual(
+            [result['status'] for result in data['results']],
+            ['created'] * 6 + ['user_not_found', 'journal_not_found']
+        )
+        self.assertEqual(JournalAccess.objects.count(), 6)
+        self.assertEqual(
+            {str(access.uuid) for access in JournalAccess.objects.all()},
+            {result['uuid'] for result in data['results'][:6]}
+        )
+        self.assertEqual(
+            JournalAccess.get_user_accessible_journal_ids(self.users[0]),
+            sorted(journal.id for journal in self.journals)
+        )
+
+    def test_bulk_grant_idempotent_on_order_number(self):
+        """ Replayed order numbers are not granted twice """
+        grant = {'user': self.users[0].username, 'journal': str(self.journals[0].uuid), 'order_number': 'ORDER-1'}
+        _, data = self._bulk_grant([grant, grant])
+        self.assertEqual([result['status'] for result in data['results']], ['created', 'exists'])
+
+        _, replayed = self._bulk_grant([grant])
+        self.assertEqual(replayed['results'][0]['status'], 'exists')
+        self.assertEqual(replayed['results'][0]['uuid'], data['results'][0]['uuid'])
+        self.assertEqual(JournalAccess.objects.count(), 1)
+
+    def test_bulk_grant_bad_request(self):
+        """ Body must hold a list of entries with a username, a journal uuid and an order number """
+        journal_uuid = str(self.journals[0].uuid)
+        self.assertEqual(self._bulk_grant('not a list')[0], 400)
+        self.assertEqual(self._bulk_grant([{'user': [self.users[0].username], 'journal': journal_uuid}])[0], 400)
+        username = self.users[0].username
+        self.assertEqual(self._bulk_grant([{'user': username, 'journal': {'uuid': journal_uuid}}])[0], 400)
+        self.assertEqual(
+            self._bulk_grant([{'user': username, 'journal': journal_uuid, 'order_number': 'O' * 129}])[0], 400
+        )
+        self.assertEqual(JournalAccess.objects.count(), 0)
+
+    @patch('journals.apps.journals.models.JOURNAL_ACCESS_CHUNK_SIZE', 2)
+    def test_bulk_grant_atomic(self):
+        """ Grants of earlier chunks are rolled back when a later chunk fails """
+        grants = [
+            {'user': user.username, 'journal': str(self.journals[0].uuid), 'order_number': 'ORDER-{}'.format(user.id)}
+            for user in self.users
+        ]
+        bulk_create = JournalAccess.objects.bulk_create
+
+        def fail_second_chunk(objs, *args, **kwargs):
+            if JournalAccess.objects.exists():
+                raise DatabaseError('second chunk failed')
+            return bulk_create(objs, *args, **kwargs)
+
+        with patch.object(JournalAccess.objects, 'bulk_create', side_effect=fail_second_chunk):
+            with self.assertRaises(DatabaseError):
+                JournalAccess.bulk_grant_journal_access(grants)
+        self.assertEqual(JournalAccess.objects.count(), 0)
+
+
+class TestBulkCreateJournalAccess(TestCase):
+    """
+    Test Cases for JournalAccess.bulk_create_journal_access
+    """
+
+    def setUp(self):
+        super(TestBulkCreateJournalAccess, self).setUp()
+        self.journal = JournalFactory(organization=OrganizationFactory(site=Site.objects.first()), uuid=uuid.uuid4())
+        self.users = UserFactory.create_batch(5)
+        self.usernames = [user.username for user in self.users] + ['unknown']
+
+    @patch('journals.apps.journals.models.JOURNAL_ACCESS_CHUNK_SIZE', 2)
+    def test_chunked_bulk_create(self):
+        """ Users are resolved and granted a chunk at a time, with a bounded number of queries per chunk """
+        # 3 chunks of users, active grants and inserts, within a transaction
+        with self.assertNumQueries(3 * 3 + 2):
+            created = JournalAccess.bulk_create_journal_access(iter(self.usernames), self.journal)
+
+        self.assertEqual(created, 5)
+        self.assertEqual(
+            set(JournalAccess.objects.values_list('user_id', flat=True)),
+            {user.id for user in self.users}
+        )
+
+    def test_users_with_active_access_skipped(self):
+        """ Users already having an active grant for the journal are not granted again """
+        JournalAccessFactory(
+            uuid=uuid.uuid4(),
+            user=self.users[0],
+            journal=self.journal,
+            expiration_date=datetime.date.today() + datetime.timedelta(days=1)
+        )
+        JournalAccessFactory(
+            uuid=uuid.uuid4(),
+            user=self.users[1],
+            journal=self.journal,
+            expiration_date=datetime.date.today() - datetime.timedelta(days=1)
+        )
+
+        self.assertEqual(JournalAccess.bulk_create_journal_access(self.usernames, self.journal), 4)
+        self.assertEqual(JournalAccess.objects.filter(user=self.users[0]).count(), 1)
+        self.assertEqual(JournalAccess.objects.filter(user=self.users[1]).count(), 2)
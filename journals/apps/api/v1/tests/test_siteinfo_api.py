@@ -0,0 +1,72 @@
+""" Test Cases for the site information API """
+import uuid
+
+from django.test import TestCase
+from django.urls import reverse
+from wagtail.wagtailcore.models import Site
+
+from journals.apps.core.tests.factories import (
+    JournalFactory,
+    OrganizationFactory,
+    SiteBrandingFactory,
+    SiteConfigurationFactory,
+    UserFactory,
+    USER_PASSWORD,
+)
+from journals.apps.journals.models import UserPageVisit
+
+
+class TestSiteInformationView(TestCase):
+    """
+    Test Cases for SiteInformationView
+    """
+
+    def setUp(self):
+        super(TestSiteInformationView, self).setUp()
+        self.user = UserFactory()
+        self.site = Site.objects.first()
+        self.site_configuration = SiteConfigurationFactory(site=self.site)
+        self.site_branding = SiteBrandingFactory(site=self.site, site_logo=None)
+        self.path = reverse('api:v1:siteinfo')
+        self.client.login(username=self.user.username, password=USER_PASSWORD)
+
+    def test_not_modified_when_etag_matches(self):
+        """ Clients sending back a current ETag get a 304 """
+        response = self.client.get(self.path)
+        etag = response['ETag']
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_with_branding_and_user_state(self):
+        """ ETag changes when the site branding or the visits of the user change """
+        etag = self.client.get(self.path)['ETag']
+
+        self.site_branding.theme_name = 'new theme'
+        self.site_branding.save()
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['theme_name'], 'new theme')
+        etag = response['ETag']
+
+        UserPageVisit.objects.create(user=self.user, page=self.site.root_page)
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['visited_pages']), 1)
+
+    def test_etag_changes_with_admin_journals(self):
+        """ ETag of admins covers every journal, however many there are """
+        admin = UserFactory(is_staff=True, is_superuser=True)
+        self.client.login(username=admin.username, password=USER_PASSWORD)
+        organization = OrganizationFactory(site=self.site)
+        for _ in range(25):
+            JournalFactory(organization=organization, uuid=uuid.uuid4(), name=str(uuid.uuid4()))
+        response = self.client.get(self.path)
+        self.assertEqual(len(response.data['authorized_journals']), 25)
+
+        JournalFactory(organization=organization, uuid=uuid.uuid4(), name=str(uuid.uuid4()))
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['authorized_journals']), 26)
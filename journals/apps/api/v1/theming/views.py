@@ -1,6 +1,8 @@
 """ API for theming / site branding """
 from urllib.parse import urlparse
 
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import views, viewsets
 from rest_framework.permissions import AllowAny
@@ -11,7 +13,12 @@ from journals.apps.api.v1.theming.filters import SiteBrandingFilter
 from journals.apps.api.v1.theming.serializers import SiteBrandingSerializer
 from journals.apps.core.models import SiteConfiguration, User
 from journals.apps.journals.models import JournalAccess, UserPageVisit
-from journals.apps.journals.utils import get_image_url
+from journals.apps.journals.utils import (
+    get_cache_key,
+    get_image_url,
+    get_site_information_generation,
+    make_md5_hash,
+)
 from journals.apps.theming.models import SiteBranding
 
 STANDARD_HTTP_PORTS = [80, 443]
@@ -42,8 +49,34 @@ class SiteInformationView(views.APIView):
             in visited_journal_about_ids
         ]
 
+    def get_etag(self, site, server_url, current_user, authorized_journals):
+        """
+        Returns the ETag of the site information, built from the versions of the site branding and
+        configuration and from the state of the requesting user
+        """
+        if current_user:
+            user = (current_user.id, current_user.username, current_user.can_access_admin)
+            visits = UserPageVisit.objects.filter(user=current_user).order_by('id').values_list(
+                'id', 'page_id', 'journal_about_id', 'visited_at', 'stale'
+            )
+        else:
+            user = None
+            visits = []
+
+        return quote_etag(get_cache_key(
+            site_id=site.id,
+            generation=get_site_information_generation(site.id),
+            server_url=server_url,
+            user=user,
+            authorized_journals=authorized_journals,
+            visits=make_md5_hash(list(visits)),
+        ))
+
     def get(self, request):
-        """ Responds to GET calls with theming, user, and site information """
+        """
+        Responds to GET calls with theming, user, and site information, or with a 304 when
+        the ETag sent in If-None-Match is still current
+        """
         if request.user.is_authenticated:
             current_user = User.objects.get(pk=self.request.user.pk)
         else:
@@ -63,15 +96,23 @@ class SiteInformationView(views.APIView):
         port = request.get_port()
         if port not in STANDARD_HTTP_PORTS:
             server_url += ':{}'.format(port)
+        # a list rather than the queryset admins get, so the ETag is built from every id in a stable order
+        authorized_journals = sorted(JournalAccess.get_user_accessible_journal_ids(request.user))
+
+        etag = self.get_etag(site, server_url, current_user, authorized_journals)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+
         logo = get_image_url(site, site.sitebranding.site_logo) if site.sitebranding.site_logo else None
         theme_name = site.sitebranding.theme_name
         lms_url_root = site.siteconfiguration.lms_public_url_root_override or site.siteconfiguration.lms_url_root
         footer_links = site.sitebranding.footer_links
-        authorized_journals = JournalAccess.get_user_accessible_journal_ids(request.user)
         segment_key = site.siteconfiguration.segment_key
         last_visited = self.get_last_visited(self.request.user) if self.request.user.is_authenticated else []
 
-        return Response({
+        response = Response({
             'user': UserSerializer(current_user).data,
             'is_authenticated': bool(current_user),
             'visited_pages': UserPageVisitSerializer(last_visited, many=True).data,
@@ -83,3 +124,5 @@ class SiteInformationView(views.APIView):
             'authorized_journals': authorized_journals,
             'segment_key': segment_key,
         })
+        response['ETag'] = etag
+        return response
@@ -2,6 +2,7 @@
 from rest_framework.routers import DefaultRouter
 from django.conf.urls import url
 
+from journals.apps.api.v1.content.views import JournalBundleView
 from journals.apps.api.v1.preview.views import PreviewView
 from journals.apps.api.v1.theming.views import SiteBrandingViewSet, SiteInformationView
 from journals.apps.api.v1.search.views import SearchView
@@ -40,5 +41,10 @@ urlpatterns += [
         r'^siteinfo/$',
         SiteInformationView.as_view(),
         name="siteinfo"
-    )
+    ),
+    url(
+        r'^bundle/(?P<journal_about_page_id>[\d]+)/$',
+        JournalBundleView.as_view(),
+        name='journal_bundle'
+    ),
 ]
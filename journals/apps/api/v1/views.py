@@ -6,15 +6,21 @@ from collections import OrderedDict
 from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotFound
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, mixins, generics, status
+from rest_framework.decorators import list_route
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 
 from journals.apps.api.filters import JournalAccessFilter, UserPageVisitFilter
 from journals.apps.api.pagination import LargeResultsSetPagination
 from journals.apps.api.permissions import UserPageVisitPermission
-from journals.apps.api.serializers import JournalAccessSerializer, UserPageVisitSerializer, UserSerializer
+from journals.apps.api.serializers import (
+    JournalAccessBulkGrantSerializer,
+    JournalAccessSerializer,
+    UserPageVisitSerializer,
+    UserSerializer,
+)
 from journals.apps.core.models import User
-from journals.apps.journals.models import Journal, JournalAccess, UserPageVisit
+from journals.apps.journals.models import BULK_GRANT_CREATED, Journal, JournalAccess, UserPageVisit
 
 
 logger = logging.getLogger(__name__)
@@ -23,7 +29,12 @@ logger = logging.getLogger(__name__)
 class JournalAccessViewSet(viewsets.ModelViewSet):
     """API for JournalAccess model"""
     lookup_field = 'uuid'
-    queryset = JournalAccess.objects.all().order_by('-created')
+    # everything the serializer reads is selected along with the grants, see JournalAccessListSerializer
+    queryset = JournalAccess.objects.select_related(
+        'user',
+        'journal__organization__site',
+        'journal__journalaboutpage__card_image',
+    ).order_by('-created')
     serializer_class = JournalAccessSerializer
     filter_backends = (DjangoFilterBackend,)
     permission_classes = (IsAdminUser,)
@@ -60,6 +71,24 @@ class JournalAccessViewSet(viewsets.ModelViewSet):
         logger.info("User [%s] granted access to journal [%s]", username, journal)
         return HttpResponse()
 
+    @list_route(methods=['post'])
+    def bulk_grant(self, request):
+        """
+        Grant JournalAccess entries in bulk, the request body being {"grants": [{"user", "journal", "order_number"}]}.
+        Entries whose order number was already granted are skipped, the response has a result per entry.
+        """
+        serializer = JournalAccessBulkGrantSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        results = JournalAccess.bulk_grant_journal_access(serializer.validated_data['grants'])
+        logger.info(
+            "Bulk granted access: [%d] entries, [%d] created",
+            len(results),
+            sum(1 for result in results if result['status'] == BULK_GRANT_CREATED)
+        )
+        return Response({'results': results})
+
     def _revoke_access(self, order_number):
         """ Revoke Access for the record with the given order_number """
         try:
@@ -1,12 +1,16 @@
 """
 Signal handlers for core app
 """
-from django.db.models.signals import post_save
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
 from wagtail.wagtailusers.models import UserProfile
 
-from journals.apps.core.models import User
+from journals.apps.core.models import SiteConfiguration, User
+from journals.apps.journals.utils import invalidate_site_information
+from journals.apps.theming.models import SiteBranding
 
 
 @receiver(post_save, sender=User)
@@ -18,3 +22,80 @@ def create_user_profile(sender, instance, created, **kwargs):  # pylint: disable
             approved_notifications=False,
             rejected_notifications=False
         )
+
+
+@receiver(post_save, sender=SiteConfiguration)
+@receiver(post_delete, sender=SiteConfiguration)
+@receiver(post_save, sender=SiteBranding)
+@receiver(post_delete, sender=SiteBranding)
+def invalidate_site_information_etag(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    invalidate_site_information(instance.site_id)
+
+
+def invalidate_admin_access_on_commit(user_ids):
+    """
+    Drop the cached admin access of the users once the change of their permissions is committed, so that
+    a concurrent request can't cache their permissions as they were before the change
+    """
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: User.invalidate_admin_access_cache(user_ids))
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_admin_access(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the cached admin access of a saved user. Nothing can be cached for a new user until it is committed,
+    so what is cached under a reused user id is dropped right away.
+    """
+    if created:
+        User.invalidate_admin_access_cache([instance.id])
+    else:
+        invalidate_admin_access_on_commit([instance.id])
+
+
+@receiver(m2m_changed, sender=User.groups.through)  # pylint: disable=no-member
+@receiver(m2m_changed, sender=User.user_permissions.through)  # pylint: disable=no-member
+def invalidate_admin_access_on_user_change(
+        sender, instance, action, reverse, pk_set, **kwargs
+):  # pylint: disable=unused-argument
+    """
+    Drop the cached admin access of users added to or removed from groups, or granted or denied permissions
+    """
+    if reverse and action == 'pre_clear':
+        # the members of the group or permission are gone once it is cleared
+        instance.cleared_user_ids = list(instance.user_set.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            user_ids = [instance.id]
+        elif action == 'post_clear':
+            user_ids = getattr(instance, 'cleared_user_ids', [])
+        else:
+            user_ids = pk_set
+        invalidate_admin_access_on_commit(user_ids)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)  # pylint: disable=no-member
+def invalidate_admin_access_on_group_change(
+        sender, instance, action, reverse, pk_set, **kwargs
+):  # pylint: disable=unused-argument
+    """
+    Drop the cached admin access of the members of groups granted or denied permissions
+    """
+    if reverse and action == 'pre_clear':
+        # the groups holding the permission are gone once it is cleared
+        instance.cleared_group_ids = list(instance.group_set.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            group_ids = [instance.id]
+        elif action == 'post_clear':
+            group_ids = getattr(instance, 'cleared_group_ids', [])
+        else:
+            group_ids = pk_set
+        invalidate_admin_access_on_commit(
+            User.objects.filter(groups__in=group_ids).values_list('id', flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Group)
+def invalidate_admin_access_on_group_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    invalidate_admin_access_on_commit(instance.user_set.values_list('id', flat=True))
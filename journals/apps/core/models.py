@@ -1,18 +1,57 @@
 """ Core models. """
+import datetime
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
 from django.db import models
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext_lazy as _
+from edx_django_utils.cache import TieredCache
 from edx_rest_api_client.client import EdxRestApiClient
 from jsonfield.fields import JSONField
+from requests import Session
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError, Timeout        # pylint:disable=redefined-builtin
-from slumber.exceptions import SlumberBaseException, HttpClientError, HttpNotFoundError
+from slumber.exceptions import SlumberBaseException, HttpClientError, HttpNotFoundError, HttpServerError
 
 log = logging.getLogger(__name__)
 
+ADMIN_ACCESS_CACHE_KEY = 'user_can_access_admin.{user_id}'
+ADMIN_ACCESS_CACHE_TIMEOUT = 60 * 60 * 24
+ACCESS_TOKEN_CACHE_KEY = 'site_configuration_access_token.{site_configuration_id}'
+# cached access tokens are dropped this many seconds before they expire, so they are not used mid-expiry
+ACCESS_TOKEN_EXPIRY_MARGIN = 60
+
+_lms_adapter = None
+
+
+def _get_lms_adapter():
+    global _lms_adapter  # pylint: disable=global-statement
+    if _lms_adapter is None:
+        _lms_adapter = HTTPAdapter(pool_maxsize=settings.LMS_USER_API_WORKERS)
+    return _lms_adapter
+
+
+class LMSSession(Session):
+    """
+    Session to the LMS whose requests time out after LMS_USER_API_TIMEOUT seconds unless told otherwise.
+    Its connections are kept alive in the process' pool, so they are reused across threads and sessions.
+    """
+
+    def __init__(self):
+        super(LMSSession, self).__init__()
+        self.mount('http://', _get_lms_adapter())
+        self.mount('https://', _get_lms_adapter())
+
+    def request(self, method, url, **kwargs):  # pylint: disable=arguments-differ
+        kwargs.setdefault('timeout', settings.LMS_USER_API_TIMEOUT)
+        return super(LMSSession, self).request(method, url, **kwargs)
+
 
 class User(AbstractUser):
     """Custom user model for use with OpenID Connect."""
@@ -38,7 +77,30 @@ class User(AbstractUser):
 
     @property
     def can_access_admin(self):
-        return self.has_perm('wagtailadmin.access_admin')
+        """
+        Whether the user can access the wagtail admin. Checking the permission loads all of the user's
+        permissions, so the result is memoized for the request and cached across requests until
+        the user, their groups or their permissions change.
+        """
+        if not self.is_active:
+            return False
+        if self.is_superuser:
+            return True
+
+        cache_key = ADMIN_ACCESS_CACHE_KEY.format(user_id=self.id)
+        cached_response = TieredCache.get_cached_response(cache_key)
+        if cached_response.is_found:
+            return cached_response.value
+
+        can_access_admin = self.has_perm('wagtailadmin.access_admin')
+        TieredCache.set_all_tiers(cache_key, can_access_admin, ADMIN_ACCESS_CACHE_TIMEOUT)
+        return can_access_admin
+
+    @staticmethod
+    def invalidate_admin_access_cache(user_ids):
+        """ Drops the cached admin access of the users, to be called whenever their permissions change """
+        for user_id in user_ids:
+            TieredCache.delete_all_tiers(ADMIN_ACCESS_CACHE_KEY.format(user_id=user_id))
 
     @classmethod
     def get_user_by_username(cls, username):
@@ -54,38 +116,87 @@ class User(AbstractUser):
         return user
 
     @classmethod
-    def account_details(cls, request, usernames):
+    def account_api_client(cls, site):
+        """
+        Returns a client to the LMS account API of the site, using the process' keep-alive
+        LMS connections and the site's cached access token.
+        """
+        site_configuration = site.siteconfiguration
+        return EdxRestApiClient(
+            site_configuration.build_lms_url('/api/user/v1'),
+            append_slash=False,
+            jwt=site_configuration.access_token,
+            session=LMSSession()
+        )
+
+    @classmethod
+    def account_details(cls, api, usernames):
         """
         Returns the account details from LMS.
 
+        Failing requests are retried up to LMS_USER_API_RETRIES times, unless the LMS rejected them, backing off
+        LMS_USER_API_RETRY_BACKOFF seconds before the first retry and twice as long before each next one.
+
         Args:
-            request (WSGIRequest): The request from which the LMS account API endpoint is created.
+            api (EdxRestApiClient): client to the LMS account API of the site, see account_api_client.
             usernames: comma separated usernames, "username1,username2,username3"
 
         Returns:
-            List of dictionaries of account details.
-
-        Raises:
-            ConnectionError, SlumberBaseException, Timeout, HttpClientError and  HttpNotFoundError
-            for failures in establishing a connection with the LMS account API endpoint.
+            List of dictionaries of account details, empty if the LMS account API endpoint could not be reached
+            or rejected the request, the error is logged.
         """
-        try:
-            api = EdxRestApiClient(
-                request.site.siteconfiguration.build_lms_url('/api/user/v1'),
-                append_slash=False,
-                jwt=request.site.siteconfiguration.access_token
-            )
-            response = api.accounts().get(username=usernames)
-            return response
-        except (ConnectionError, SlumberBaseException, Timeout, HttpClientError, HttpNotFoundError) as exc:
-            log.exception(
+        attempts = settings.LMS_USER_API_RETRIES + 1
+        for attempt in range(1, attempts + 1):
+            try:
+                response = api.accounts().get(username=usernames)
+                return response
+            except (ConnectionError, Timeout, HttpServerError) as exc:
+                if attempt < attempts:
+                    log.warning(
+                        'Retrying account details for {usernames} after attempt {attempt} failed due to: '
+                        '{exception}'.format(usernames=usernames, attempt=attempt, exception=str(exc))
+                    )
+                    time.sleep(settings.LMS_USER_API_RETRY_BACKOFF * 2 ** (attempt - 1))
+                    continue
+                error = exc
+            except (SlumberBaseException, HttpClientError, HttpNotFoundError) as exc:
+                error = exc
+            log.error(
                 'Failed to retrieve account details for {usernames} due to: {exception}'.format(
                     usernames=usernames,
-                    exception=str(exc)
-                )
+                    exception=str(error)
+                ),
+                exc_info=error
             )
             return []
 
+    @classmethod
+    def bulk_account_details(cls, site, username_batches):
+        """
+        Returns the account details from LMS of batches of usernames.
+
+        The batches are looked up concurrently on up to LMS_USER_API_WORKERS threads, sharing one
+        client, keep-alive connections and access token.
+
+        Args:
+            site (Site): The site from which the LMS account API endpoint is created.
+            username_batches: lists of usernames, each looked up with a single request.
+
+        Returns:
+            List of dictionaries of account details of every batch.
+        """
+        if not username_batches:
+            return []
+
+        api = cls.account_api_client(site)
+        workers = min(settings.LMS_USER_API_WORKERS, len(username_batches))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            responses = executor.map(
+                lambda usernames: cls.account_details(api, ",".join(usernames)),
+                username_batches
+            )
+            return [account for response in responses for account in response]
+
     @python_2_unicode_compatible
     def __str__(self):
         return str(self.username)
@@ -228,13 +339,24 @@ class SiteConfiguration(models.Model):
             str: JWT access token
         """
 
+        # only cached in the django cache, the request cache has no expiry and outlives the token in
+        # long running processes such as the user import worker
+        cache_key = ACCESS_TOKEN_CACHE_KEY.format(site_configuration_id=self.id)
+        access_token = cache.get(cache_key)
+        if access_token is not None:
+            return access_token
+
         url = '{root}/access_token'.format(root=self.oauth2_provider_url)
-        access_token, expiration_datetime = EdxRestApiClient.get_oauth_access_token(  # pylint: disable=unused-variable
+        access_token, expiration_datetime = EdxRestApiClient.get_oauth_access_token(
             url,
             self.oauth_settings['SOCIAL_AUTH_EDX_OIDC_KEY'],
             self.oauth_settings['SOCIAL_AUTH_EDX_OIDC_SECRET'],
             token_type='jwt'
         )
+        expires_in = (expiration_datetime - datetime.datetime.utcnow()).total_seconds()
+        timeout = int(expires_in) - ACCESS_TOKEN_EXPIRY_MARGIN
+        if timeout > 0:
+            cache.set(cache_key, access_token, timeout)
         return access_token
 
     @property
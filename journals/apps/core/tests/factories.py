@@ -10,12 +10,14 @@ import factory
 from factory.fuzzy import FuzzyText
 from faker import Faker
 from wagtail.wagtailcore.models import Page, Site
+from wagtail.wagtailimages.models import Filter
 
 from journals.apps.journals.models import (
     Journal,
     JournalAboutPage,
     JournalAccess,
     JournalImage,
+    JournalImageRendition,
     JournalPage,
     Organization,
     JournalDocument,
@@ -112,7 +114,7 @@ class OrganizationFactory(factory.DjangoModelFactory):
 
 class JournalFactory(factory.DjangoModelFactory):
     """ Model factory for Journal model """
-    uuid = uuid.uuid4()
+    uuid = factory.LazyFunction(uuid.uuid4)
     name = FuzzyText(prefix='journal-name')
 
     class Meta:
@@ -121,7 +123,7 @@ class JournalFactory(factory.DjangoModelFactory):
 
 class JournalAccessFactory(factory.DjangoModelFactory):
     """ Model factory for JournalAccess model """
-    uuid = uuid.uuid4()
+    uuid = factory.LazyFunction(uuid.uuid4)
     revoked = False
 
     class Meta:
@@ -183,6 +185,22 @@ class ImageFactory(factory.DjangoModelFactory):
         model = JournalImage
 
 
+class ImageRenditionFactory(factory.DjangoModelFactory):
+    """ Model factory for JournalImageRendition model, an already generated original rendition by default """
+
+    image = factory.SubFactory(ImageFactory)
+    filter_spec = 'original'
+    focal_point_key = factory.LazyAttribute(
+        lambda rendition: Filter(spec=rendition.filter_spec).get_cache_key(rendition.image)
+    )
+    file = factory.LazyAttribute(lambda rendition: 'original_images/{}.png'.format(rendition.image.id))
+    width = factory.SelfAttribute('image.width')
+    height = factory.SelfAttribute('image.height')
+
+    class Meta:
+        model = JournalImageRendition
+
+
 class DocumentFactory(factory.DjangoModelFactory):
     """ Model factory for Document model """
 
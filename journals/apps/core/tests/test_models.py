@@ -1,10 +1,20 @@
 """ Tests for core models. """
+import datetime
 
-from django.test import TestCase
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django_dynamic_fixture import G
+from edx_django_utils.cache import TieredCache
+from mock import Mock, patch
+from requests.exceptions import Timeout
+from slumber.exceptions import HttpClientError, HttpServerError
 from social_django.models import UserSocialAuth
+from wagtail.wagtailcore.models import Site
 
 from journals.apps.core.models import User
+from journals.apps.core.tests.factories import SiteConfigurationFactory
+from journals.apps.core.tests.utils import capture_on_commit_callbacks
 
 
 class UserTests(TestCase):
@@ -43,3 +53,136 @@ class UserTests(TestCase):
         username = 'bob'
         user = G(User, username=username)
         self.assertEqual(str(user), username)
+
+
+class UserAdminAccessTests(TestCase):
+    """ Tests for the cached admin access of users. """
+
+    def setUp(self):
+        super(UserAdminAccessTests, self).setUp()
+        self.user = G(User, is_superuser=False, is_active=True)
+        self.group = G(Group)
+        self.group.permissions.add(Permission.objects.get(content_type__app_label='wagtailadmin',
+                                                          codename='access_admin'))
+
+    def _get_user(self):
+        return User.objects.get(id=self.user.id)
+
+    def test_admin_access_cached(self):
+        """ Permissions are only loaded once across requests """
+        self.assertFalse(self._get_user().can_access_admin)
+        user = self._get_user()
+        with self.assertNumQueries(0):
+            self.assertFalse(user.can_access_admin)
+
+    def test_admin_access_invalidated_on_group_changes(self):
+        """ Cached admin access is dropped when the user's groups or the groups' permissions change """
+        self.assertFalse(self._get_user().can_access_admin)
+
+        with capture_on_commit_callbacks():
+            self.user.groups.add(self.group)
+        self.assertTrue(self._get_user().can_access_admin)
+
+        with capture_on_commit_callbacks():
+            self.group.permissions.clear()
+        self.assertFalse(self._get_user().can_access_admin)
+
+        with capture_on_commit_callbacks():
+            self.group.permissions.add(Permission.objects.get(content_type__app_label='wagtailadmin',
+                                                              codename='access_admin'))
+        self.assertTrue(self._get_user().can_access_admin)
+
+        with capture_on_commit_callbacks():
+            self.group.user_set.remove(self.user)
+        self.assertFalse(self._get_user().can_access_admin)
+
+    def test_admin_access_invalidated_once_committed(self):
+        """ Cached admin access is only dropped once the change is committed, and after cleared groups are gone """
+        self.user.groups.add(self.group)
+        self.assertTrue(self._get_user().can_access_admin)
+
+        with capture_on_commit_callbacks(execute=False) as callbacks:
+            self.user.groups.clear()
+        self.assertTrue(self._get_user().can_access_admin)
+
+        for callback in callbacks:
+            callback()
+        self.assertFalse(self._get_user().can_access_admin)
+
+        with capture_on_commit_callbacks():
+            self.user.groups.add(self.group)
+        self.assertTrue(self._get_user().can_access_admin)
+
+        with capture_on_commit_callbacks():
+            self.group.user_set.clear()
+        self.assertFalse(self._get_user().can_access_admin)
+
+
+@override_settings(LMS_USER_API_RETRIES=1)
+class UserAccountDetailsTests(TestCase):
+    """ Tests for the LMS account lookups of users. """
+
+    def setUp(self):
+        super(UserAccountDetailsTests, self).setUp()
+        TieredCache.dangerous_clear_all_tiers()
+        self.site_configuration = SiteConfigurationFactory(site=Site.objects.first())
+        self.api = Mock()
+
+    @patch('journals.apps.core.models.EdxRestApiClient.get_oauth_access_token')
+    def test_access_token_cached(self, mock_get_oauth_access_token):
+        """ The site's access token is fetched once until shortly before it expires """
+        mock_get_oauth_access_token.return_value = (
+            'token', datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+        )
+        self.assertEqual(self.site_configuration.access_token, 'token')
+        self.assertEqual(self.site_configuration.access_token, 'token')
+        self.assertEqual(mock_get_oauth_access_token.call_count, 1)
+
+        # the token only lives in the django cache, so it is fetched again once it expires there
+        cache.clear()
+        mock_get_oauth_access_token.return_value = (
+            'expiring', datetime.datetime.utcnow() + datetime.timedelta(seconds=30)
+        )
+        self.assertEqual(self.site_configuration.access_token, 'expiring')
+        self.assertEqual(self.site_configuration.access_token, 'expiring')
+        self.assertEqual(mock_get_oauth_access_token.call_count, 3)
+
+    @patch('journals.apps.core.models.time.sleep')
+    def test_account_details_retried(self, mock_sleep):
+        """ Timed out lookups are retried after a backoff, rejected ones are not """
+        accounts = [{'username': 'user_1'}]
+        self.api.accounts.return_value.get.side_effect = [Timeout(), accounts]
+        self.assertEqual(User.account_details(self.api, 'user_1'), accounts)
+
+        self.api.accounts.return_value.get.side_effect = [Timeout(), Timeout()]
+        self.assertEqual(User.account_details(self.api, 'user_1'), [])
+
+        self.api.accounts.return_value.get.side_effect = [HttpClientError(), accounts]
+        self.assertEqual(User.account_details(self.api, 'user_1'), [])
+        self.assertEqual(self.api.accounts.return_value.get.call_count, 5)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    @override_settings(LMS_USER_API_RETRIES=2, LMS_USER_API_RETRY_BACKOFF=0.5)
+    @patch('journals.apps.core.models.time.sleep')
+    def test_account_details_backoff_doubles(self, mock_sleep):
+        """ Each retry waits twice as long as the previous one """
+        accounts = [{'username': 'user_1'}]
+        self.api.accounts.return_value.get.side_effect = [HttpServerError(), Timeout(), accounts]
+        self.assertEqual(User.account_details(self.api, 'user_1'), accounts)
+        self.assertEqual([call[0][0] for call in mock_sleep.call_args_list], [0.5, 1.0])
+
+    @patch.object(User, 'account_api_client')
+    def test_bulk_account_details(self, mock_account_api_client):
+        """ Batches are looked up with a single client and their account details are merged """
+        mock_account_api_client.return_value = self.api
+        self.api.accounts.return_value.get.side_effect = lambda username: [
+            {'username': name} for name in username.split(',')
+        ]
+
+        site = self.site_configuration.site
+        accounts = User.bulk_account_details(site, [['user_1', 'user_2'], ['user_3'], ['user_4']])
+
+        self.assertEqual([account['username'] for account in accounts], ['user_1', 'user_2', 'user_3', 'user_4'])
+        self.assertEqual(mock_account_api_client.call_count, 1)
+        self.assertEqual(self.api.accounts.return_value.get.call_count, 3)
+        self.assertEqual(User.bulk_account_details(site, []), [])
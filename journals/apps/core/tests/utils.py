@@ -1,9 +1,14 @@
 """ Helper Methods for Journal Tests and Test Data """
 import uuid
+from contextlib import contextmanager
+
+from django.test import TestCase
+from mock import patch
+from wagtail.wagtailcore.models import Site
 
 from journals.apps.journals.blocks import RAW_HTML_BLOCK_TYPE
 from .factories import JournalAboutPageFactory, JournalPageFactory, ImageFactory, DocumentFactory, VideoFactory, \
-    RAW_HTML_BLOCK
+    JournalFactory, OrganizationFactory, RAW_HTML_BLOCK
 
 # Default test data for a journal
 TEST_JOURNAL_STRUCTURE = {
@@ -182,9 +187,41 @@ def create_nested_journal_pages(journal_page, path, depth, slug, journal_about_p
         )
 
 
+@contextmanager
+def capture_on_commit_callbacks(execute=True):
+    """
+    Collects the callbacks registered with transaction.on_commit, which are never run in a TestCase
+    since its transaction is rolled back, and runs them on exit when execute is set
+    """
+    callbacks = []
+    with patch('django.db.transaction.on_commit', side_effect=callbacks.append):
+        yield callbacks
+    if execute:
+        for callback in callbacks:
+            callback()
+
+
 # Functions to compare test journals
 
 
+class JournalTestCase(TestCase):
+    """
+    Test case with a journal of the default site whose about page holds the pages of TEST_JOURNAL_STRUCTURE
+    """
+
+    def setUp(self):
+        super(JournalTestCase, self).setUp()
+        self.site = Site.objects.first()
+        self.org = OrganizationFactory(site=self.site)
+        self.journal = JournalFactory(organization=self.org)
+        self.journal_about_page = create_journal_about_page_factory(
+            journal=self.journal,
+            journal_structure=TEST_JOURNAL_STRUCTURE,
+            root_page=self.site.root_page,
+            about_page_slug='journal-about-page-slug'
+        )
+
+
 def is_nested_list_equivalent(actual, expected):
     """
     Return True if actual has the same values and nodes as expected,
@@ -17,7 +17,7 @@ from wagtail.wagtaildocs.wagtail_hooks import DocumentsSummaryItem
 from wagtail.wagtailimages.permissions import permission_policy as image_permission_policy
 from wagtail.wagtailimages.wagtail_hooks import ImagesSummaryItem
 
-from journals.apps.journals.models import WagtailModelManager
+from journals.apps.journals.models import JournalAboutPage, JournalStructure, WagtailModelManager
 from journals.apps.journals.wagtailadmin.forms import GroupVideoPermissionFormSet
 from journals.apps.journals.wagtailadmin.views import AdminCommandsView
 
@@ -71,6 +71,28 @@ def pages_user_has_permissions(parent_page, pages, request):  # pylint: disable=
     return WagtailModelManager.get_user_pages(request.user, pages=pages)
 
 
+@hooks.register('after_delete_page')
+def rebuild_journal_structure(request, page):  # pylint: disable=unused-argument
+    """
+    Rebuilds the structure snapshot of the journal a deleted page belonged to
+    """
+    # page is already deleted here but its path is still in memory, which is all ancestor_of needs
+    journal_about_page = JournalAboutPage.objects.ancestor_of(page).first()
+    if journal_about_page:
+        JournalStructure.rebuild(journal_about_page)
+
+
+@hooks.register('after_copy_page')
+def rebuild_copied_journal_structure(request, page, new_page):  # pylint: disable=unused-argument
+    """
+    Rebuilds the structure snapshot of the journal a page was copied into, copies kept live are not published
+    """
+    # resolved from the tree, copies keep the about page reference of the page they were copied from
+    journal_about_page = JournalAboutPage.objects.ancestor_of(new_page).first()
+    if journal_about_page:
+        JournalStructure.rebuild(journal_about_page)
+
+
 @hooks.register('construct_homepage_summary_items')
 def add_pages_summary_item(request, items):
     """
@@ -10,7 +10,7 @@ from journals.apps.journals.models import (
     Organization,
     Video,
 )
-from journals.apps.journals.views import JournalAccessView
+from journals.apps.journals.views import JournalAccessView, UserImportJobStatusView
 
 
 # Custom admin pages
@@ -41,6 +41,11 @@ class JournalAdmin(admin.ModelAdmin):
 
     def get_urls(self):
         my_urls = [
+            url(
+                r'(?P<journal_id>[0-9]+)/actions/import_users/(?P<job_id>[0-9]+)/$',
+                self.admin_site.admin_view(UserImportJobStatusView.as_view()),
+                name='import_users_status'
+            ),
             url(
                 r'(?P<journal_id>[0-9]+)/actions/import_users/',
                 self.admin_site.admin_view(JournalAccessView.as_view()),
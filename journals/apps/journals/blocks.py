@@ -10,7 +10,8 @@ from wagtail.wagtaildocs.blocks import DocumentChooserBlock
 from wagtail.wagtailimages.blocks import ImageChooserBlock
 from wagtail.wagtailcore.rich_text import extract_attrs, get_link_handler, get_embed_handler, FIND_A_TAG, FIND_EMBED_TAG
 
-from journals.apps.journals.models import JournalDocument, Video
+from journals.apps.journals.journal_page_helper import get_specific_pages
+from journals.apps.journals.models import JournalDocument, JournalImage, Video
 from journals.apps.journals.widgets import AdminVideoChooser
 from journals.apps.journals.utils import get_image_url, get_span_id
 
@@ -22,10 +23,69 @@ RAW_HTML_BLOCK_TYPE = 'raw_html'
 STREAM_DATA_TYPE_FIELD = 'type'
 STREAM_DATA_DOC_FIELD = 'doc'
 STREAM_DATA_VIDEO_FIELD = 'video'
+STREAM_DATA_IMAGE_FIELD = 'image'
+
+# Payloads rendered ahead of any request use urls on hosts of the reserved .invalid TLD, which never
+# appear in real content, as substitution points for the scheme, host and site root of the request
+PRERENDER_HOSTNAME = 'journals-base-url.invalid'
+PRERENDER_SITE_ROOT_URL = 'http://journals-site-root.invalid'
 
 log = logging.getLogger(__name__)
 
 
+def get_base_url(request):
+    """ Base url that rich text links and embeds are made absolute with """
+    return urljoin("{}://{}:{}".format(
+        request.scheme,
+        request.site.hostname,
+        request.site.port,
+    ), '/')
+
+
+class PrerenderSite(object):
+    """ Stands in for request.site while pre-rendering block payloads """
+    hostname = PRERENDER_HOSTNAME
+    port = 80
+    root_url = PRERENDER_SITE_ROOT_URL
+
+
+class PrerenderRequest(object):
+    """ Stands in for the request while pre-rendering block payloads """
+    scheme = 'http'
+    site = PrerenderSite()
+
+
+def prerender_stream(stream_value):
+    """
+    Render the API payload of every block of stream_value without a request, see render_prerendered_stream
+    """
+    return stream_value.stream_block.get_api_representation(stream_value, context={'request': PrerenderRequest()})
+
+
+def render_prerendered_stream(payload, request):
+    """
+    Fill the substitution points of a payload from prerender_stream with the urls of the request
+    """
+    replacements = (
+        (get_base_url(PrerenderRequest()), get_base_url(request)),
+        (PRERENDER_SITE_ROOT_URL, request.site.root_url),
+    )
+
+    def substitute(value):
+        """ Replace the placeholder urls in value, recursing into the dicts and lists of the payload """
+        if isinstance(value, six.string_types):
+            for placeholder, url in replacements:
+                value = value.replace(placeholder, url)
+            return value
+        if isinstance(value, dict):
+            return {key: substitute(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [substitute(item) for item in value]
+        return value
+
+    return substitute(payload)
+
+
 class VideoChooserBlock(blocks.ChooserBlock):
     """VideoChooserBlock component"""
     target_model = Video
@@ -42,11 +102,45 @@ class VideoChooserBlock(blocks.ChooserBlock):
             return value
 
 
-class PDFBlock(blocks.StructBlock):
+class BulkChooserStructBlockMixin(object):
+    """
+    Resolves the chosen object of every instance of a StructBlock in a StreamField at once.
+
+    StreamValue calls bulk_to_python with the raw values of all its children of the block's type,
+    so a page with 40 images costs one query for the images instead of one query per image.
+    """
+    chooser_field = None
+
+    def get_chooser_queryset(self):
+        return self.child_blocks[self.chooser_field].target_model.objects.all()
+
+    def bulk_to_python(self, values):
+        """ Converts the raw values of many blocks, loading their chosen objects with a single query """
+        values = list(values)
+        chosen_ids = {value.get(self.chooser_field) for value in values} - {None}
+        chosen_objects = self.get_chooser_queryset().in_bulk(chosen_ids) if chosen_ids else {}
+
+        return [
+            blocks.StructValue(self, [
+                (
+                    name,
+                    chosen_objects.get(value.get(self.chooser_field)) if name == self.chooser_field
+                    else child_block.to_python(value[name]) if name in value
+                    else child_block.get_default()
+                )
+                for name, child_block in self.child_blocks.items()
+            ])
+            for value in values
+        ]
+
+
+class PDFBlock(BulkChooserStructBlockMixin, blocks.StructBlock):
     """PDFBlock component"""
     doc = DocumentChooserBlock()
     title = blocks.CharBlock(required=False, help_text='Override document title')
 
+    chooser_field = STREAM_DATA_DOC_FIELD
+
     def get_title(self, value):
         return value.get('title')
 
@@ -77,17 +171,78 @@ class PDFBlock(blocks.StructBlock):
         }
 
 
+class RichTextLinkResolver(object):
+    """
+    Resolves the page and document links of one or more rich text sources in bulk, with one query
+    per model the first time any of the links is looked up
+    """
+    def __init__(self, sources):
+        self.sources = list(sources)
+        self._pages = None
+        self._documents = None
+
+    def _resolve(self):
+        """ Loads the pages and documents linked from all the sources """
+        page_ids = set()
+        document_ids = set()
+        for source in self.sources:
+            for match in FIND_A_TAG.finditer(source or ''):
+                attrs = extract_attrs(match.group(1))
+                link_id = self._get_id(attrs.get('id'))
+                if link_id is None:
+                    continue
+                if attrs.get('linktype') == 'page':
+                    page_ids.add(link_id)
+                elif attrs.get('linktype') == 'document':
+                    document_ids.add(link_id)
+
+        self._pages = {
+            page.id: page for page in get_specific_pages(Page.objects.filter(id__in=page_ids))
+        } if page_ids else {}
+        self._documents = JournalDocument.objects.in_bulk(document_ids) if document_ids else {}
+
+    @staticmethod
+    def _get_id(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def get_page(self, page_id):
+        if self._pages is None:
+            self._resolve()
+        return self._pages.get(self._get_id(page_id))
+
+    def get_document(self, document_id):
+        if self._documents is None:
+            self._resolve()
+        return self._documents.get(self._get_id(document_id))
+
+
 class JournalRichTextBlock(blocks.RichTextBlock):
     """JournalRichTextBlock component"""
     def get_searchable_content(self, value):
         return [parser(value.source, 'html.parser').get_text(' ')]
 
+    def bulk_to_python(self, values):
+        """
+        Called by StreamValue with the sources of every rich text block of a page, the blocks share one
+        link resolver so the links of all of them are resolved together
+        """
+        rich_texts = [self.to_python(value) for value in values]
+        link_resolver = RichTextLinkResolver(rich_text.source for rich_text in rich_texts)
+        for rich_text in rich_texts:
+            rich_text.link_resolver = link_resolver
+        return rich_texts
+
     @staticmethod
-    def expand_db_html(html, for_editor=False, base_url='/'):
+    def expand_db_html(html, for_editor=False, base_url='/', link_resolver=None):
         """
         Override from wagtail.wagtailcore.rich_text to use full path
         to embedded images
         """
+        link_resolver = link_resolver or RichTextLinkResolver([html])
+
         def replace_a_tag(m):
             """
             overridden, return href for Pages and Documents that
@@ -98,18 +253,16 @@ class JournalRichTextBlock(blocks.RichTextBlock):
                 # return unchanged
                 return m.group(0)
             if attrs['linktype'] == 'page':
-                try:
-                    page = Page.objects.get(id=attrs['id'])
-                    return '<a href="{page_path}">'.format(page_path=page.specific.get_frontend_page_path())
-                except Page.DoesNotExist:
-                    return "<a>"
+                page = link_resolver.get_page(attrs.get('id'))
+                if page:
+                    return '<a href="{page_path}">'.format(page_path=page.get_frontend_page_path())
+                return "<a>"
 
             if attrs['linktype'] == 'document':
-                try:
-                    doc = JournalDocument.objects.get(id=attrs['id'])
+                doc = link_resolver.get_document(attrs.get('id'))
+                if doc:
                     return '<a href="{viewer_path}" target="_blank">'.format(viewer_path=doc.get_viewer_url(base_url))
-                except Page.DoesNotExist:
-                    return "<a>"
+                return "<a>"
 
             handler = get_link_handler(attrs['linktype'])
             return handler.expand_db_attributes(attrs, for_editor)
@@ -131,13 +284,11 @@ class JournalRichTextBlock(blocks.RichTextBlock):
         return html
 
     def get_api_representation(self, value, context=None):
-        request = context['request']
-        base_url = urljoin("{}://{}:{}".format(
-            request.scheme,
-            request.site.hostname,
-            request.site.port,
-        ), '/')
-        return self.expand_db_html(value.source, base_url=base_url)
+        return self.expand_db_html(
+            value.source,
+            base_url=get_base_url(context['request']),
+            link_resolver=getattr(value, 'link_resolver', None)
+        )
 
 
 class JournalRawHTMLBlock(blocks.RawHTMLBlock):
@@ -156,11 +307,13 @@ class JournalRawHTMLBlock(blocks.RawHTMLBlock):
         return [parser(six.text_type(value), 'html.parser').get_text()]
 
 
-class XBlockVideoBlock(blocks.StructBlock):
+class XBlockVideoBlock(BulkChooserStructBlockMixin, blocks.StructBlock):
     """XBlockVideoBlock component"""
     video = VideoChooserBlock(required=True)
     title = blocks.CharBlock(required=False, help_text='Override video title')
 
+    chooser_field = STREAM_DATA_VIDEO_FIELD
+
     def get_title(self, value):
         return value.get('title')
 
@@ -193,7 +346,7 @@ class XBlockVideoBlock(blocks.StructBlock):
         }
 
 
-class JournalImageChooserBlock(blocks.StructBlock):
+class JournalImageChooserBlock(BulkChooserStructBlockMixin, blocks.StructBlock):
     """ JournalImageChooserBlock component """
     image = ImageChooserBlock()
     title = blocks.CharBlock(required=False, help_text='Override image title')
@@ -203,8 +356,14 @@ class JournalImageChooserBlock(blocks.StructBlock):
         features=['h1', 'h2', 'h3', 'ol', 'ul', 'bold', 'italic', 'link', 'hr', 'document-link']
     )
 
+    chooser_field = STREAM_DATA_IMAGE_FIELD
+
+    def get_chooser_queryset(self):
+        # renditions are loaded along so that get_image_url doesn't query them per image
+        return JournalImage.objects.prefetch_related('renditions')
+
     def get_image(self, value):
-        return value.get('image')
+        return value.get(STREAM_DATA_IMAGE_FIELD)
 
     def get_title(self, value):
         return value.get('title')
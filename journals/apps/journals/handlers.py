@@ -1,32 +1,74 @@
 """
 Handlers for journal page signals
 """
-from django.db.models.signals import pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch.dispatcher import receiver
-from journals.apps.journals.utils import delete_block_references
 from wagtail.wagtailcore.signals import page_published, page_unpublished
 
-from .models import JournalAboutPage, JournalPage, JournalDocument, JournalImage
+from journals.apps.core.models import User
+from journals.apps.journals.utils import (
+    delete_block_references,
+    invalidate_page_response_cache,
+    run_in_background,
+)
+from .models import (
+    JournalAboutPage,
+    JournalAccess,
+    JournalPage,
+    JournalDocument,
+    JournalImage,
+    JournalImageRendition,
+    JournalStructure,
+    Video,
+)
 
 
 def page_pub_receiver(sender, **kwargs):  # pylint: disable=unused-argument
     journal_page = kwargs['instance']
     journal_page.update_related_objects()
+    journal_page.prerender_body()
+    rebuild_journal_bundle(JournalStructure.rebuild_for_page(journal_page))
 
 
 def page_unpub_receiver(sender, **kwargs):  # pylint: disable=unused-argument
     journal_page = kwargs['instance']
     journal_page.update_related_objects(clear=True)
+    rebuild_journal_bundle(JournalStructure.rebuild_for_page(journal_page))
+
+
+def rebuild_journal_bundle(snapshot):
+    """
+    Build the bundle of the journal of a rebuilt structure snapshot in the background once the publish
+    is committed, so neither the publishing request nor the first reader after a publish has to.
+    The bundle is still built on read if the background build is lost.
+    """
+    if snapshot:
+        run_in_background(build_journal_bundle, snapshot.id)
+
+
+def build_journal_bundle(snapshot_id):
+    """
+    Build the bundle of the journal of a structure snapshot
+    """
+    try:
+        snapshot = JournalStructure.objects.select_related('journal_about_page').get(id=snapshot_id)
+    except JournalStructure.DoesNotExist:
+        # the journal was deleted since
+        return
+    snapshot.journal_about_page.get_bundle(snapshot)
 
 
 def about_page_pub_receiver(sender, **kwargs):  # pylint: disable=unused-argument
     journal_about_page = kwargs['instance']
     journal_about_page.update_related_objects()
+    # a new slug changes the url of every page in the journal
+    rebuild_journal_bundle(JournalStructure.rebuild(journal_about_page))
 
 
 def about_page_unpub_receiver(sender, **kwargs):  # pylint: disable=unused-argument
     journal_about_page = kwargs['instance']
     journal_about_page.update_related_objects(deactivate=True)
+    invalidate_page_response_cache(journal_about_page.id)
 
 
 def connect_page_signals_handlers():
@@ -63,4 +105,129 @@ def delete_image_references(sender, instance, *args, **kwargs):     # pylint: di
     delete_block_references(instance, IMAGE_BLOCK_TYPE)
 
 
+@receiver(pre_delete, sender=JournalPage)
+def collect_deleted_page_videos(sender, instance, **kwargs):     # pylint: disable=unused-argument
+    """
+    Remember the videos shown on a page being deleted, their relation to it is gone once it is deleted
+    """
+    instance.deleted_video_ids = list(instance.videos.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=JournalPage)
+def update_deleted_page_videos(sender, instance, **kwargs):     # pylint: disable=unused-argument
+    """
+    Map the videos of a deleted page to the journal of the pages still showing them
+    """
+    Video.update_journal_uuids(getattr(instance, 'deleted_video_ids', []))
+
+
+@receiver(pre_save, sender=JournalDocument)
+@receiver(pre_save, sender=JournalImage)
+@receiver(pre_save, sender=Video)
+def collect_rendered_field_changes(sender, instance, update_fields=None, **kwargs):  # pylint: disable=unused-argument
+    """
+    Remember whether the save of a document, image or video changes any of the RENDERED_FIELDS shown in
+    page bodies, other saves (focal point, file size, tags...) leave the rendered bodies as they are
+    """
+    fields = sender.RENDERED_FIELDS if update_fields is None else set(sender.RENDERED_FIELDS) & set(update_fields)
+    stored_values = None
+    if instance.pk and fields:
+        stored_values = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    instance.changes_rendered_fields = bool(stored_values) and any(
+        getattr(instance, field) != stored_values[field] for field in fields
+    )
+
+
+@receiver(post_save, sender=JournalDocument)
+@receiver(post_save, sender=JournalImage)
+@receiver(post_save, sender=Video)
+def rerender_page_bodies(sender, instance, created, **kwargs):     # pylint: disable=unused-argument
+    """
+    Render again, in the background, the bodies of the live pages showing an edited document, image or video.
+    Their outdated bodies are dropped right away, so the pages are rendered on read until then.
+    """
+    if not created and getattr(instance, 'changes_rendered_fields', False):
+        JournalPage.discard_rendered_bodies(get_pages_using(instance))
+        run_in_background(rerender_pages_showing, sender, instance.id)
+
+
+def rerender_pages_showing(model, object_id):
+    """
+    Render again the bodies of the live pages showing the document, image or video of the given model and id
+    """
+    try:
+        instance = model.objects.get(id=object_id)
+    except model.DoesNotExist:
+        # deleted since, its references were removed from the pages along with it
+        return
+    rerender_pages_using(instance)
+
+
+def get_pages_using(instance):
+    """
+    Returns the journal pages showing a document, image or video
+    """
+    return instance.get_usage() if isinstance(instance, Video) else instance.get_journal_page_usage()
+
+
+def rerender_pages_using(instance):
+    """
+    Render again the bodies of the live pages showing a document, image or video and drop their cached responses
+    """
+    JournalPage.rerender_live_pages(get_pages_using(instance))
+
+
+@receiver(post_save, sender=JournalImage)
+def pregenerate_image_renditions(sender, instance, **kwargs):     # pylint: disable=unused-argument
+    """
+    Generate the renditions of an uploaded or edited image in the background rather than in the first API request,
+    which still generates them if the background generation is lost
+    """
+    run_in_background(generate_image_renditions, instance.id)
+
+
+@receiver(post_delete, sender=JournalImageRendition)
+def regenerate_image_renditions(sender, instance, **kwargs):     # pylint: disable=unused-argument
+    """
+    Renditions are deleted when the file of an image is replaced, generate them again from the new file
+    and render the pages showing the image with their new urls. Their bodies pointing at the deleted
+    renditions are dropped right away, so the pages are rendered on read until then.
+    """
+    if instance.filter_spec in JournalImage.PREGENERATED_RENDITIONS:
+        JournalPage.discard_rendered_bodies(JournalPage.objects.filter(images=instance.image_id))
+        run_in_background(generate_image_renditions, instance.image_id, rerender_pages=True)
+
+
+def generate_image_renditions(image_id, rerender_pages=False):
+    """
+    Generate the renditions of an image served by the API
+    """
+    try:
+        image = JournalImage.objects.get(id=image_id)
+    except JournalImage.DoesNotExist:
+        # deleted along with its renditions
+        return
+    image.generate_renditions()
+    if rerender_pages:
+        rerender_pages_using(image)
+
+
+@receiver(post_save, sender=JournalAccess)
+@receiver(post_delete, sender=JournalAccess)
+def invalidate_journal_access_cache(sender, instance, **kwargs):     # pylint: disable=unused-argument
+    """
+    Drop the cached grants of the user whenever one of their access records is created, revoked or deleted.
+    """
+    JournalAccess.invalidate_user_access_cache_on_commit([instance.user_id])
+
+
+@receiver(post_save, sender=User)
+def invalidate_new_user_access_cache(sender, instance, created, **kwargs):     # pylint: disable=unused-argument
+    """
+    A new user has no grants, make sure nothing cached under a reused user id is served to them.
+    """
+    if created:
+        JournalAccess.invalidate_user_access_cache(instance.id)
+
+
 connect_page_signals_handlers()
@@ -1,12 +1,15 @@
 """ Helpers for Journal Page Types """
 import uuid
+from collections import defaultdict
 from urllib.parse import urljoin
 
+from django.contrib.contenttypes.models import ContentType
 from django.core.cache import cache
 from django.shortcuts import redirect
 from django.utils.cache import add_never_cache_headers
 from django.template.defaultfilters import pluralize
 from django.utils.translation import ugettext_lazy as _
+from rest_framework.fields import Field
 
 from wagtail.wagtailcore.models import PagePermissionTester, UserPagePermissionsProxy
 from journals.apps.journals.utils import get_cache_key
@@ -18,7 +21,8 @@ class JournalPagePermissionTester(PagePermissionTester):
             Overridden to prevent some pages from being deleted from CMS
         """
         from journals.apps.journals.models import JournalIndexPage, JournalAboutPage
-        if isinstance(self.page.specific, (JournalAboutPage, JournalIndexPage)):
+        # specific_class comes from the content type cache, unlike specific it costs no query per listed page
+        if issubclass(self.page.specific_class, (JournalAboutPage, JournalIndexPage)):
             return False
         return super(JournalPagePermissionTester, self).can_delete()
 
@@ -30,65 +34,168 @@ class UserJournalPagePermissionsProxy(UserPagePermissionsProxy):
         return JournalPagePermissionTester(self, page)
 
 
-class JournalPageMixin(object):
-    """ This class contains methods that are shared between Journal Page Types """
+def flatten_children(children):
+    """
+    Children should always be a list of dicts. In the case that a there is an unpublished page between two
+    published pages, the unpublished page will simply be a list of it's children, instead of a dict of it's
+    content, plus a children field. This flattens that list of children into the parent list children to keep
+    a valid tree structure.
+    """
+    flat_children = []
+    for child in children:
+        if isinstance(child, dict):
+            flat_children.append(child)
+        elif isinstance(child, list):
+            for subchild in child:
+                flat_children.append(subchild)
+    return flat_children
 
-    def flatten_children(self, children):
+
+def get_specific_pages(pages):
+    """
+    Upcast Page objects to their specific page types (JournalPage, JournalAboutPage, JournalIndexPage...)
+    with one query per content type instead of one query per page. Order of pages is preserved, pages
+    that are already specific are returned as they are.
+    """
+    pages = list(pages)
+    page_ids_by_model = defaultdict(list)
+    for page in pages:
+        model = ContentType.objects.get_for_id(page.content_type_id).model_class()
+        if model and not isinstance(page, model):
+            page_ids_by_model[model].append(page.id)
+
+    specific_pages = {}
+    for model, page_ids in page_ids_by_model.items():
+        specific_pages.update(model.objects.in_bulk(page_ids))
+
+    return [specific_pages.get(page.id, page) for page in pages]
+
+
+def get_ancestor_paths(page):
+    """ Return the treebeard paths of every ancestor of page, root first """
+    return [page.path[:position] for position in range(page.steplen, len(page.path), page.steplen)]
+
+
+class PageTree(object):
+    """
+    In-memory view of a page and all of its descendants.
+
+    Descendants are loaded with a single query ordered by treebeard path, so the nested
+    hierarchy can be built without a query per node. With specific=True they are upcast to
+    their specific page types with one more query per content type.
+    """
+
+    def __init__(self, root_page, specific=False):
+        self.root_page = root_page
+        self.pages = list(root_page.get_descendants().order_by('path'))
+        if specific:
+            self.pages = get_specific_pages(self.pages)
+        self._children = defaultdict(list)
+        self._paths_with_live_descendants = set()
+
+        for page in self.pages:
+            self._children[self._parent_path(page)].append(page)
+
+        # children sort after their parent by path, so walking backwards sees every
+        # descendant of a page before the page itself
+        for page in reversed(self.pages):
+            if page.live or page.path in self._paths_with_live_descendants:
+                self._paths_with_live_descendants.add(self._parent_path(page))
+
+    @staticmethod
+    def _parent_path(page):
+        return page.path[:-page.steplen]
+
+    def get_children(self, page):
+        """ Return the children of page ordered as in the page tree """
+        return self._children.get(page.path, [])
+
+    def has_live_descendants(self, page):
+        return page.path in self._paths_with_live_descendants
+
+    def get_navigation(self):
+        """
+        Return the previous and next live page of every descendant as {page_id: [previous_id, next_id]}.
+
+        Path order is depth first order, so the neighbours of a page are the closest live pages
+        before and after it in the list of descendants, whether or not the page itself is live.
+        """
+        navigation = {}
+        previous_id = None
+        for page in self.pages:
+            navigation[page.id] = [previous_id, None]
+            if page.live:
+                previous_id = page.id
+
+        next_id = None
+        for page in reversed(self.pages):
+            navigation[page.id][1] = next_id
+            if page.live:
+                next_id = page.id
+
+        return navigation
+
+    def get_bread_crumbs(self):
         """
-        Children should always be a list of dicts. In the case that a there is an unpublished page between two
-        published pages, the unpublished page will simply be a list of it's children, instead of a dict of it's
-        content, plus a children field. This flattens that list of children into the parent list children to keep
-        a valid tree structure.
+        Return the ordered live ancestors of every descendant as {page_id: [{"title", "id"}]}.
+        The root page and the pages above it are not part of the bread crumbs.
         """
-        flat_children = []
-        for child in children:
-            if isinstance(child, dict):
-                flat_children.append(child)
-            elif isinstance(child, list):
-                for subchild in child:
-                    flat_children.append(subchild)
-        return flat_children
+        live_pages_by_path = {page.path: page for page in self.pages if page.live}
+        return {
+            page.id: [
+                {"title": ancestor.title, "id": ancestor.id}
+                for ancestor in (live_pages_by_path.get(path) for path in get_ancestor_paths(page))
+                if ancestor
+            ]
+            for page in self.pages
+        }
 
-    def get_nested_children(self, live_only=True):
-        """ Return dict hierarchy with self as root """
+    def get_nested_children(self, page, live_only=True):
+        """ Return dict hierarchy with page as root """
 
         # TODO: can remove "url" field once we move to seperated front end
-        if self.live:
+        if page.live:
             structure = {
-                "title": self.title,
+                "title": page.title,
                 "children": None,
-                "id": self.id,
-                "url": self.url
+                "id": page.id,
+                "url": page.url
             }
         else:
             structure = None
 
-        children = self.get_children()
-        if not children or (live_only and self.get_descendants().live().count() == 0):
+        children = self.get_children(page)
+        if not children or (live_only and not self.has_live_descendants(page)):
             return structure
 
+        structure_children = flatten_children([
+            struct for struct in
+            (
+                self.get_nested_children(child, live_only=live_only)
+                for child in children
+            )
+            if struct is not None
+        ])
+
         if structure:
-            structure_children = [
-                struct for struct in
-                (
-                    child.specific.get_nested_children(live_only=live_only)
-                    for child in children
-                )
-                if struct is not None
-            ]
-            structure["children"] = self.flatten_children(structure_children)
-        else:
-            structure = [
-                struct for struct in
-                (
-                    child.specific.get_nested_children(live_only=live_only)
-                    for child in children
-                )
-                if struct is not None
-            ]
-            structure = self.flatten_children(structure)
+            structure["children"] = structure_children
+            return structure
+        return structure_children
 
-        return structure
+
+class JournalPageMixin(object):
+    """ This class contains methods that are shared between Journal Page Types """
+
+    def flatten_children(self, children):
+        """
+        Flattens the lists left in place of unpublished pages into their parent's children,
+        see flatten_children
+        """
+        return flatten_children(children)
+
+    def get_nested_children(self, live_only=True):
+        """ Return dict hierarchy with self as root """
+        return PageTree(self).get_nested_children(self, live_only=live_only)
 
     def get_serializer(self, request):
         """
@@ -180,6 +287,22 @@ class JournalPageMixin(object):
         return user_perms.for_page(self)
 
 
+class PrerenderedBodyField(Field):
+    """
+    Serializes the body of a JournalPage from the payload rendered when the page was published,
+    the body is rendered on the spot when that payload is missing or outdated (e.g. on preview)
+    """
+    def __init__(self, **kwargs):
+        kwargs.update(source='*', read_only=True)
+        super(PrerenderedBodyField, self).__init__(**kwargs)
+
+    def to_representation(self, value):
+        return value.get_body_api_representation(self.context['request'])
+
+    def to_internal_value(self, data):
+        pass
+
+
 class ReferencedObjectMixin(object):
     """
     Mixin class that has helper methods for objects referenced by Journal Pages
@@ -0,0 +1,34 @@
+"""
+Management command to fill the journal_about_page reference of every JournalPage.
+
+JournalPage.get_journal_about_page no longer saves the calculated value, so pages published
+before the reference was introduced (or moved outside of the CMS) can be backfilled with
+`./manage.py backfill_journal_about_pages`
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from journals.apps.journals.models import JournalAboutPage, JournalPage
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    '''Management command to backfill journal_about_page on journal pages'''
+    help = 'Fills the journal_about_page reference of every JournalPage from the page tree'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        total_updated = 0
+        for journal_about_page in JournalAboutPage.objects.all():
+            # one UPDATE per journal, only touching pages whose reference is missing or stale
+            updated = JournalPage.objects.descendant_of(journal_about_page).exclude(
+                journal_about_page=journal_about_page
+            ).update(journal_about_page=journal_about_page)
+            if updated:
+                logger.info('Set journal about page of %d pages to [%s]', updated, journal_about_page)
+            total_updated += updated
+
+        self.stdout.write('Updated journal about page of {} journal pages'.format(total_updated))
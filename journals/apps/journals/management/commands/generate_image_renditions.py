@@ -0,0 +1,26 @@
+"""
+Management command to generate the renditions served by the API for every JournalImage.
+
+Renditions are generated in the background when an image is saved, images uploaded before that
+can have theirs generated ahead of the first reads with `./manage.py generate_image_renditions`
+"""
+from django.core.management.base import BaseCommand
+
+from journals.apps.journals.models import JournalImage
+
+
+class Command(BaseCommand):
+    '''Management command to generate the renditions of journal images'''
+    help = 'Generates the renditions served by the API for every JournalImage'
+
+    def handle(self, *args, **options):
+        failed = 0
+        images = JournalImage.objects.all()
+        for image in images.iterator():
+            try:
+                image.generate_renditions()
+            except (IOError, OSError) as err:
+                failed += 1
+                self.stderr.write('Could not generate renditions of image [{}]: {}'.format(image.id, err))
+
+        self.stdout.write('Generated renditions of {} journal images'.format(images.count() - failed))
@@ -0,0 +1,24 @@
+"""
+Management command to render the API payload of the body of every live JournalPage.
+
+Bodies are rendered when a page is published, pages published before that (or whose rendered
+body is outdated) can be rendered ahead of the first reads with `./manage.py prerender_journal_pages`
+"""
+from django.core.management.base import BaseCommand
+
+from journals.apps.journals.models import JournalPage
+
+
+class Command(BaseCommand):
+    '''Management command to render the body of live journal pages'''
+    help = 'Renders the API payload of the body of every live JournalPage'
+
+    def handle(self, *args, **options):
+        rendered = 0
+        for journal_page in JournalPage.objects.live().iterator():
+            if journal_page.has_current_rendered_body():
+                continue
+            journal_page.prerender_body()
+            rendered += 1
+
+        self.stdout.write('Rendered body of {} journal pages'.format(rendered))
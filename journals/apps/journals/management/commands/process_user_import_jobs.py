@@ -0,0 +1,54 @@
+"""
+Management command to run the queued user import jobs.
+
+Imports of users from the admin are queued in the database, run them with
+`./manage.py process_user_import_jobs`, or `./manage.py process_user_import_jobs --once` to exit once
+the queue is empty. Several workers can run at the same time, each job is only run by one of them.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from edx_django_utils.cache import RequestCache
+
+from journals.apps.journals.models import UserImportJob
+
+
+class Command(BaseCommand):
+    '''Management command to run the queued user import jobs'''
+    help = 'Runs the queued user import jobs, waiting for new ones unless --once is given'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of waiting for new jobs',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=settings.USER_IMPORT_POLL_INTERVAL,
+            help='Seconds to wait before checking an empty queue again',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            # every job is run like a request of its own, without the connections or request cache of the previous one
+            close_old_connections()
+            RequestCache.clear_all_namespaces()
+            import_job = UserImportJob.claim_next()
+            if import_job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            import_job.run()
+            self.stdout.write('{}: {}, {} users added, {} users already had access and {} users skipped'.format(
+                import_job,
+                import_job.status,
+                import_job.added_count,
+                import_job.existing_count,
+                import_job.skipped_count
+            ))
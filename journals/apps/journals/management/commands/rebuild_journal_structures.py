@@ -0,0 +1,34 @@
+"""
+Management command to store the structure snapshot of every journal.
+
+Snapshots are stored when a page of the journal is published, unpublished, moved or deleted, journals
+untouched since then are built in memory on every read until stored with `./manage.py rebuild_journal_structures`
+"""
+from django.core.management.base import BaseCommand
+
+from journals.apps.journals.models import JournalAboutPage, JournalStructure
+
+
+class Command(BaseCommand):
+    '''Management command to store the structure snapshot of journals'''
+    help = 'Stores the structure snapshot of every JournalAboutPage without one'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            dest='all',
+            help='Rebuild the snapshots of every journal, not only the missing ones',
+        )
+
+    def handle(self, *args, **options):
+        journal_about_pages = JournalAboutPage.objects.all()
+        if not options['all']:
+            journal_about_pages = journal_about_pages.filter(structure_snapshot__isnull=True)
+
+        rebuilt = 0
+        for journal_about_page in journal_about_pages.iterator():
+            JournalStructure.rebuild(journal_about_page)
+            rebuilt += 1
+
+        self.stdout.write('Rebuilt structure snapshot of {} journals'.format(rebuilt))
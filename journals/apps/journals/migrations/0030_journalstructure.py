@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.18 on 2026-10-16 12:00
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import jsonfield.fields
+import model_utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journals', '0029_auto_20181029_0903'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JournalStructure',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('structure', jsonfield.fields.JSONField(default=list)),
+                ('journal_about_page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='structure_snapshot', to='journals.JournalAboutPage')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.18 on 2026-10-16 12:00
+from __future__ import unicode_literals
+
+from django.db import migrations
+import jsonfield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journals', '0031_journalstructure_navigation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='journalstructure',
+            name='bread_crumbs',
+            field=jsonfield.fields.JSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.18 on 2026-10-16 12:00
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def backfill_journal_about_pages(apps):
+    """ Fills the journal_about_page reference of the pages of each journal from their tree paths """
+    JournalAboutPage = apps.get_model('journals', 'JournalAboutPage')
+    JournalPage = apps.get_model('journals', 'JournalPage')
+    for journal_about_page in JournalAboutPage.objects.all():
+        JournalPage.objects.filter(
+            path__startswith=journal_about_page.path,
+            depth__gt=journal_about_page.depth
+        ).exclude(
+            journal_about_page=journal_about_page
+        ).update(journal_about_page=journal_about_page)
+
+
+def populate_journal_uuids(apps, schema_editor):
+    backfill_journal_about_pages(apps)
+
+    Video = apps.get_model('journals', 'Video')
+    JournalPageVideos = apps.get_model('journals', 'JournalPage').videos.through
+    journal_uuids = {}
+    for video_id, journal_uuid in JournalPageVideos.objects.filter(
+        journalpage__live=True,
+        journalpage__journal_about_page__journal__isnull=False
+    ).order_by('journalpage__path').values_list('video_id', 'journalpage__journal_about_page__journal__uuid'):
+        journal_uuids.setdefault(video_id, journal_uuid)
+
+    for video_id, journal_uuid in journal_uuids.items():
+        Video.objects.filter(id=video_id).update(journal_uuid=journal_uuid)
+
+
+class Migration(migrations.Migration):
+    """ Adds the journal uuid of each video and populates it from the live pages showing them """
+
+    dependencies = [
+        ('journals', '0033_journalpage_rendered_body'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='journal_uuid',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_journal_uuids, migrations.RunPython.noop),
+    ]
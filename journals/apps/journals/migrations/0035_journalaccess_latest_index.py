@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.18 on 2026-10-16 12:00
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journals', '0034_video_journal_uuid'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journalaccess',
+            index=models.Index(fields=['user', 'journal', 'expiration_date'], name='journalaccess_latest_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.18 on 2026-10-16 12:00
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journals', '0035_journalaccess_latest_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journalaccess',
+            index=models.Index(fields=['user', 'revoked', 'expiration_date'], name='journalaccess_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalaccess',
+            index=models.Index(fields=['order_number'], name='journalaccess_order_idx'),
+        ),
+    ]
@@ -3,20 +3,25 @@ from __future__ import absolute_import, unicode_literals
 
 import base64
 import datetime
+import itertools
 import json
 import logging
 import mimetypes
 import uuid
+from collections import defaultdict
 from urllib.parse import quote, urljoin, urlparse, urlsplit, urlunsplit
 
 import requests
 from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
-from django.db import models
+from django.db import models, transaction
 
 from django.http import HttpResponseRedirect
+from django.utils import six, timezone
+from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
+from edx_django_utils.cache import TieredCache
 from model_utils.models import TimeStampedModel
 
 from jsonfield.fields import JSONField
@@ -32,17 +37,29 @@ from wagtail.wagtailcore.models import Collection, CollectionMember, Page
 from wagtail.wagtailcore.permission_policies.collections import CollectionOwnershipPermissionPolicy
 from wagtail.wagtaildocs.models import AbstractDocument, Document
 from wagtail.wagtailimages.edit_handlers import ImageChooserPanel
-from wagtail.wagtailimages.models import AbstractImage, AbstractRendition, Image
+from wagtail.wagtailimages.models import AbstractImage, AbstractRendition, Filter, Image
 from wagtail.wagtailsearch import index
 from wagtail.wagtailsearch.queryset import SearchableQuerySetMixin
 
 from journals.apps.core.models import User
 from journals.apps.journals.api_utils import update_service
-from journals.apps.journals.journal_page_helper import JournalPageMixin, ReferencedObjectMixin
+from journals.apps.journals.journal_page_helper import (
+    JournalPageMixin,
+    PageTree,
+    PrerenderedBodyField,
+    ReferencedObjectMixin,
+    get_ancestor_paths,
+)
 from journals.apps.journals.utils import (
+    chunked,
     get_cache_key,
     get_image_url,
+    get_image_urls,
     get_default_expiration_date,
+    get_page_response_cache_generation,
+    invalidate_page_response_cache,
+    make_md5_hash,
+    parse_csv,
 )
 from journals.apps.search.backend import LARGE_TEXT_FIELD_SEARCH_PROPS
 
@@ -51,6 +68,16 @@ logger = logging.getLogger(__name__)
 JOURNAL_PAGE_PREVIEW_PATH = 'pagePreview'
 JOURNAL_ABOUT_PAGE_PREVIEW_PATH = 'aboutPreview'
 JOURNAL_INDEX_PAGE_PREVIEW_PATH = 'indexPreview'
+JOURNAL_BUNDLE_CACHE_TIMEOUT = 60 * 60 * 24
+JOURNAL_ACCESS_CACHE_TIMEOUT = 60 * 60 * 24
+# version of structure snapshots built in memory, stored snapshots start at 1
+UNSAVED_STRUCTURE_VERSION = 0
+# users, journals and orders are read, and grants inserted, this many at a time by the bulk grant methods
+JOURNAL_ACCESS_CHUNK_SIZE = 1000
+BULK_GRANT_CREATED = 'created'
+BULK_GRANT_EXISTS = 'exists'
+BULK_GRANT_USER_NOT_FOUND = 'user_not_found'
+BULK_GRANT_JOURNAL_NOT_FOUND = 'journal_not_found'
 RICH_TEXT_FEATURES = [
     'h1', 'h2', 'h3', 'ol', 'ul', 'bold', 'italic', 'link', 'hr', 'document-link', 'image', 'code-block'
 ]
@@ -206,6 +233,16 @@ class JournalAccess(TimeStampedModel):
     revoked = models.BooleanField(default=False, null=False)
     revoked_date = models.DateField(null=True)
 
+    class Meta(object):
+        indexes = [
+            # newest grant of a user for a journal, see JournalAccessFilter.filter_latest
+            models.Index(fields=['user', 'journal', 'expiration_date'], name='journalaccess_latest_idx'),
+            # active grants of a user, see get_active_access_for_user and get_user_accessible_journal_ids
+            models.Index(fields=['user', 'revoked', 'expiration_date'], name='journalaccess_active_idx'),
+            # grants of an ecommerce order, see revoke_journal_access
+            models.Index(fields=['order_number'], name='journalaccess_order_idx'),
+        ]
+
     def __str__(self):
         return str(self.uuid)
 
@@ -216,7 +253,62 @@ class JournalAccess(TimeStampedModel):
             return []
         if user.can_access_admin:
             return Journal.objects.all().values_list('id', flat=True)
-        return cls.get_active_access_for_user(user).values_list('journal__id', flat=True)
+        return cls._get_cached_journal_ids_for_user(user)
+
+    @classmethod
+    def _get_cached_journal_ids_for_user(cls, user):
+        """
+        Returns the ids of the journals the user has an active grant for. They are memoized for the request
+        and cached across requests until the user's grants change, or until the earliest of the grants
+        expires, whichever comes first.
+        """
+        cache_key = cls._get_journal_ids_cache_key(user.id)
+        cached_response = TieredCache.get_cached_response(cache_key)
+        if cached_response.is_found:
+            return cached_response.value
+
+        today = datetime.date.today()
+        grants = list(cls.objects.filter(
+            user=user,
+            revoked=False,
+            expiration_date__gte=today
+        ).values_list('journal_id', 'expiration_date'))
+        journal_ids = sorted({journal_id for journal_id, _ in grants})
+
+        timeout = JOURNAL_ACCESS_CACHE_TIMEOUT
+        if grants:
+            # a grant counts through its expiration date, it stops counting at the start of the next day
+            earliest_expiry = datetime.datetime.combine(
+                min(expiration_date for _, expiration_date in grants) + datetime.timedelta(days=1),
+                datetime.time.min
+            )
+            timeout = min(timeout, int((earliest_expiry - datetime.datetime.now()).total_seconds()) + 1)
+
+        TieredCache.set_all_tiers(cache_key, journal_ids, timeout)
+        return journal_ids
+
+    @classmethod
+    def invalidate_user_access_cache(cls, user_id):
+        """ Drops the cached journal ids of the user, to be called whenever the user's grants change """
+        TieredCache.delete_all_tiers(cls._get_journal_ids_cache_key(user_id))
+
+    @classmethod
+    def invalidate_user_access_cache_on_commit(cls, user_ids):
+        """
+        Drops the cached journal ids of the users once the change of their grants is committed, so that
+        a concurrent request can't cache their grants as they were before the change
+        """
+        user_ids = list(user_ids)
+
+        def invalidate():
+            for user_id in user_ids:
+                cls.invalidate_user_access_cache(user_id)
+
+        transaction.on_commit(invalidate)
+
+    @staticmethod
+    def _get_journal_ids_cache_key(user_id):
+        return get_cache_key(resource='journal_access_journal_ids', user_id=user_id)
 
     @classmethod
     def get_active_access_for_user(cls, user):
@@ -236,11 +328,7 @@ class JournalAccess(TimeStampedModel):
         if user.can_access_admin:
             return True
 
-        access_items = cls.get_active_access_for_user(user).filter(
-            journal=journal
-        )
-
-        return True if access_items else False
+        return journal.id in cls.get_user_accessible_journal_ids(user)
 
     @classmethod
     def create_journal_access(cls, user, journal, order_number=None):
@@ -258,29 +346,124 @@ class JournalAccess(TimeStampedModel):
         access.save()
         return access
 
+    @classmethod
+    def bulk_grant_journal_access(cls, grants):
+        """
+        Grants access for many entries at once, reading their users, journals and orders with a query each
+        per chunk of entries and inserting the grants of a chunk in a single statement. All chunks are
+        granted in a single transaction.
+        Entries whose order number already has a grant are not granted again, so replaying them is safe.
+
+        Args:
+            grants (list): dicts with the 'user' username, the 'journal' uuid and an optional 'order_number'
+
+        Returns:
+            list with a dict per entry, in order, with its 'status' and the 'uuid' of its grant if it has one
+        """
+        results = []
+        granted_order_numbers = {}
+        granted_user_ids = set()
+        with transaction.atomic():
+            for chunk in chunked(grants, JOURNAL_ACCESS_CHUNK_SIZE):
+                results.extend(cls._bulk_grant_chunk(chunk, granted_order_numbers, granted_user_ids))
+
+        # bulk_create doesn't send post_save, so the cached grants are dropped here
+        cls.invalidate_user_access_cache_on_commit(granted_user_ids)
+        return results
+
+    @classmethod
+    def _bulk_grant_chunk(cls, grants, granted_order_numbers, granted_user_ids):
+        """
+        Grants access for a chunk of entries, granted_order_numbers carries the orders granted by earlier chunks
+        and the users granted access are added to granted_user_ids
+        """
+        journal_uuids = {cls._parse_uuid(grant.get('journal')) for grant in grants} - {None}
+        user_ids = dict(User.objects.filter(
+            username__in={grant.get('user') for grant in grants}
+        ).values_list('username', 'id'))
+        journals = {journal.uuid: journal for journal in Journal.objects.filter(uuid__in=journal_uuids)}
+        order_numbers = {grant.get('order_number') for grant in grants} - {None}
+        granted_order_numbers.update(
+            cls.objects.filter(order_number__in=order_numbers - set(granted_order_numbers)).values_list(
+                'order_number', 'uuid'
+            )
+        )
+
+        results = []
+        new_grants = []
+        for grant in grants:
+            username = grant.get('user')
+            order_number = grant.get('order_number')
+            result = {'user': username, 'journal': grant.get('journal'), 'order_number': order_number}
+            journal = journals.get(cls._parse_uuid(grant.get('journal')))
+            if order_number in granted_order_numbers:
+                result.update(status=BULK_GRANT_EXISTS, uuid=granted_order_numbers[order_number])
+            elif username not in user_ids:
+                result.update(status=BULK_GRANT_USER_NOT_FOUND)
+            elif not journal:
+                result.update(status=BULK_GRANT_JOURNAL_NOT_FOUND)
+            else:
+                access = cls(
+                    user_id=user_ids[username],
+                    journal=journal,
+                    expiration_date=get_default_expiration_date(journal),
+                    order_number=order_number,
+                )
+                new_grants.append(access)
+                if order_number:
+                    granted_order_numbers[order_number] = access.uuid
+                result.update(status=BULK_GRANT_CREATED, uuid=access.uuid)
+            results.append(result)
+
+        cls.objects.bulk_create(new_grants)
+        granted_user_ids.update(access.user_id for access in new_grants)
+        return results
+
+    @staticmethod
+    def _parse_uuid(value):
+        try:
+            return uuid.UUID(str(value))
+        except ValueError:
+            return None
+
     @classmethod
     def bulk_create_journal_access(cls, usernames, journal, expiration_date=None):
         """
         Bulk create the JournalAccess on the given parameters
 
+        Usernames are resolved and grants inserted a chunk at a time within a single transaction, so memory
+        and the number of queries stay bounded whatever the number of usernames. Users who already have
+        an active grant for the journal are skipped.
+
         Args:
-            usernames (set): Set of valid usernames.
-            journal_id: Journal's id on which we want to give access to users.
+            usernames (iterable): Valid usernames.
+            journal: Journal on which we want to give access to users.
             expiration_date:  Journal access' expiration date for all the users.
+
+        Returns:
+            int: number of grants created
         """
-        journal_access_list = []
         expiration_date = expiration_date if expiration_date else get_default_expiration_date(journal)
-        for username in usernames:
-            user = User.get_user_by_username(username)
-            if user:
-                journal_access_list.append(
-                    cls(
-                        user=user,
-                        journal=journal,
-                        expiration_date=expiration_date
-                    )
+        today = datetime.date.today()
+        granted_user_ids = []
+        with transaction.atomic():
+            for chunk in chunked(usernames, JOURNAL_ACCESS_CHUNK_SIZE):
+                user_ids = set(User.objects.filter(username__in=chunk).values_list('id', flat=True))
+                user_ids -= set(cls.objects.filter(
+                    journal=journal,
+                    user_id__in=user_ids,
+                    revoked=False,
+                    expiration_date__gte=today
+                ).values_list('user_id', flat=True))
+                cls.objects.bulk_create(
+                    (cls(user_id=user_id, journal=journal, expiration_date=expiration_date) for user_id in user_ids),
+                    batch_size=JOURNAL_ACCESS_CHUNK_SIZE
                 )
-        cls.objects.bulk_create(journal_access_list)
+                granted_user_ids.extend(user_ids)
+
+        # bulk_create doesn't send post_save, so the cached grants are dropped here
+        cls.invalidate_user_access_cache_on_commit(granted_user_ids)
+        return len(granted_user_ids)
 
     @classmethod
     def revoke_journal_access(cls, order_number):
@@ -296,6 +479,165 @@ class JournalAccess(TimeStampedModel):
         return access_record
 
 
+class UserImportJob(TimeStampedModel):
+    """
+    Import of the users of an uploaded CSV file, giving them access to a journal.
+
+    Jobs are queued from the admin and run by the `process_user_import_jobs` worker, which saves
+    their counts of added, already granted and skipped users as it goes so the admin can poll their progress.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, _('Queued')),
+        (RUNNING, _('Running')),
+        (SUCCEEDED, _('Succeeded')),
+        (FAILED, _('Failed')),
+    )
+
+    journal = models.ForeignKey(Journal, on_delete=models.CASCADE, related_name='user_import_jobs')
+    site = models.ForeignKey('wagtailcore.Site', on_delete=models.CASCADE)
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    csv_file = models.FileField(upload_to='user_imports', help_text=_('CSV file of the usernames to import'))
+    expiration_date = models.DateField(null=True, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+    added_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    existing_count = models.PositiveIntegerField(default=0, help_text=_('Users who already had access'))
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return 'User import {} of {}'.format(self.id, self.journal)
+
+    @property
+    def is_finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    @classmethod
+    def enqueue(cls, journal, site, csv_file, expiration_date=None, created_by=None):
+        """
+        Queues the import of the usernames of the CSV file, to be run by the worker. The file is stored
+        as uploaded, it is only parsed by the worker.
+        """
+        return cls.objects.create(
+            journal=journal,
+            site=site,
+            created_by=created_by,
+            csv_file=csv_file,
+            expiration_date=expiration_date,
+        )
+
+    @classmethod
+    def claim_next(cls):
+        """
+        Marks the oldest queued job as running and returns it, None when no job is queued.
+
+        Jobs are claimed with a conditional update, so each job is only run once by concurrent workers.
+        Stale running jobs are failed first, see fail_stale_jobs.
+        """
+        cls.fail_stale_jobs()
+        while True:
+            job_id = cls.objects.filter(status=cls.QUEUED).order_by('id').values_list('id', flat=True).first()
+            if job_id is None:
+                return None
+            now = timezone.now()
+            claimed = cls.objects.filter(id=job_id, status=cls.QUEUED).update(
+                status=cls.RUNNING, started_at=now, modified=now
+            )
+            if claimed:
+                return cls.objects.get(id=job_id)
+
+    @classmethod
+    def fail_stale_jobs(cls):
+        """
+        Fails the running jobs that saved no progress for USER_IMPORT_JOB_TIMEOUT seconds, their worker
+        crashed or was stopped before finishing them.
+
+        They aren't queued again so a file that brings the worker down isn't retried forever. Users granted
+        before the worker stopped keep their access, so the file can just be uploaded again.
+        """
+        stale_before = timezone.now() - datetime.timedelta(seconds=settings.USER_IMPORT_JOB_TIMEOUT)
+        for import_job in cls.objects.filter(status=cls.RUNNING, modified__lt=stale_before):
+            logger.warning('User import job {} stopped making progress, marking it as failed'.format(import_job.id))
+            import_job.finish(cls.FAILED, 'The import was interrupted, upload the file again to finish it.')
+
+    def finish(self, status, error=''):
+        """ Marks the job as finished and deletes its CSV file, the usernames it holds aren't kept once imported """
+        self.status = status
+        self.error = error
+        self.finished_at = timezone.now()
+        self.csv_file.delete(save=False)  # pylint: disable=no-member
+        self.save(update_fields=['status', 'error', 'csv_file', 'finished_at', 'modified'])
+
+    def get_or_create_journal_users(self, usernames):
+        """
+        Checks whether the usernames are valid (do exist in journal database)
+        if a username doesn't exist then fetch its data from LMS and create
+        a user in journal.apps.models.USER. The missing usernames are fetched from LMS concurrently in
+        batches of BATCH_SIZE_FOR_LMS_USER_API.
+
+        Returns:
+            returns the set of valid usernames (exist in journal database)
+        """
+        existing_users = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        non_existing_users = list(set(usernames) - existing_users)
+        users = []
+        users_lms_data = User.bulk_account_details(
+            self.site, list(chunked(non_existing_users, settings.BATCH_SIZE_FOR_LMS_USER_API))
+        )
+        for user_data in users_lms_data:
+            username = user_data['username']
+            existing_users.add(username)
+            users.append(
+                User(
+                    username=username,
+                    email=user_data.get('email', ""),
+                    is_active=user_data.get('is_active', "False")
+                )
+            )
+            logger.info("'{}' user has been added in journal.".format(username))
+        User.objects.bulk_create(users)
+        return existing_users
+
+    def run(self):
+        """
+        Give journal's access to the job's users.
+
+        The CSV file is streamed and its usernames are checked, created from LMS and granted access a window
+        of USER_IMPORT_WINDOW_SIZE usernames at a time, so imports run in constant memory, and the counts are
+        saved after each window. The file is deleted once the job is finished.
+        """
+        status, error = self.SUCCEEDED, ''
+        try:
+            self.csv_file.open('rb')
+            for window in chunked(parse_csv(self.csv_file), settings.USER_IMPORT_WINDOW_SIZE):
+                window = set(window)
+                valid_usernames = self.get_or_create_journal_users(window)
+                granted_count = JournalAccess.bulk_create_journal_access(
+                    valid_usernames, self.journal, self.expiration_date
+                )
+
+                skipped_usernames = window - valid_usernames
+                if skipped_usernames:
+                    logger.warning(
+                        "Following usernames have been skipped: [{}]".format(", ".join(skipped_usernames))
+                    )
+                self.added_count += granted_count
+                self.existing_count += len(valid_usernames) - granted_count
+                self.skipped_count += len(skipped_usernames)
+                self.save(update_fields=['added_count', 'existing_count', 'skipped_count', 'modified'])
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.exception('User import job {} failed'.format(self.id))
+            status, error = self.FAILED, str(exc)
+        finally:
+            self.csv_file.close()
+        self.finish(status, error)
+
+
 class JournalDocument(AbstractDocument, ReferencedObjectMixin):
     '''
     Override the base Document model so we can index the Document contents for search
@@ -316,6 +658,9 @@ class JournalDocument(AbstractDocument, ReferencedObjectMixin):
 
     admin_form_fields = Document.admin_form_fields
 
+    # fields shown in the bodies of the pages showing the document, they are rendered again when one changes
+    RENDERED_FIELDS = ('title', 'file')
+
     def data(self):
         '''
         Return the contents of the document as base64 encoded
@@ -363,9 +708,34 @@ class JournalImage(AbstractImage, ReferencedObjectMixin):
         'caption',
     )
 
+    # renditions served by the API, generated in the background whenever the image is saved
+    PREGENERATED_RENDITIONS = ('original',)
+    # fields shown in the bodies of the pages showing the image, they are rendered again when one changes
+    RENDERED_FIELDS = ('title', 'file', 'width', 'height', 'caption')
+
     def get_object_type(self):
         return "image"
 
+    def generate_renditions(self):
+        """ Generates the renditions served by the API ahead of the requests needing them """
+        for filter_spec in self.PREGENERATED_RENDITIONS:
+            self.get_rendition(filter_spec)
+
+    def get_rendition(self, filter):  # pylint: disable=redefined-builtin
+        """
+        Overridden to pick the rendition from the prefetched renditions of the image, if they were
+        loaded with prefetch_related('renditions'), instead of querying for it
+        """
+        prefetched_renditions = getattr(self, '_prefetched_objects_cache', {}).get('renditions')
+        if prefetched_renditions is not None:
+            if isinstance(filter, six.string_types):
+                filter = Filter(spec=filter)
+            focal_point_key = filter.get_cache_key(self)
+            for rendition in prefetched_renditions:
+                if rendition.filter_spec == filter.spec and rendition.focal_point_key == focal_point_key:
+                    return rendition
+        return super(JournalImage, self).get_rendition(filter)
+
 
 class JournalImageRendition(AbstractRendition):
     image = models.ForeignKey(JournalImage, related_name='renditions', on_delete=models.CASCADE)
@@ -390,11 +760,16 @@ class Video(CollectionMember, index.Indexed, models.Model):
     transcript_url = models.URLField(max_length=255, null=True)
     source_course_run = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
+    # uuid of the journal of the first live page showing the video, see update_journal_uuids
+    journal_uuid = models.UUIDField(null=True, blank=True, editable=False)
 
     tags = TaggableManager(help_text=None, blank=True, verbose_name=_('tags'))
 
     objects = VideoQuerySet.as_manager()
 
+    # fields shown in the bodies of the pages showing the video, they are rendered again when one changes
+    RENDERED_FIELDS = ('display_name', 'view_url', 'transcript_url')
+
     search_fields = CollectionMember.search_fields + [
         index.SearchField('display_name', partial_match=True),
         index.SearchField('transcript', partial_match=False, es_extra=LARGE_TEXT_FIELD_SEARCH_PROPS),
@@ -435,18 +810,50 @@ class Video(CollectionMember, index.Indexed, models.Model):
         Return the url to access the video on LMS based on the Journal that the video
         is found in.
         '''
-        journal_page = JournalPage.objects.filter(videos=self).live().distinct().first()
-        journal_uuid = journal_page.get_journal().uuid if journal_page else 0
-
         url = self.view_url.replace(
             "xblock",
             "journals/render_journal_block"
         )
         return "{url}?journal_uuid={journal_uuid}".format(
             url=url,
-            journal_uuid=journal_uuid
+            journal_uuid=self.journal_uuid or 0
         )
 
+    @classmethod
+    def update_journal_uuids(cls, video_ids):
+        """
+        Map each of the given videos to the journal of the first live page, in page tree order, showing it.
+        To be called whenever pages showing the videos are published, unpublished, moved or deleted.
+        Pages whose about page reference is not filled yet are skipped, see backfill_journal_about_pages.
+
+        The uuids are saved with queryset updates, so the live pages showing the videos whose journal changed
+        are rendered again here, their rendered bodies embedding the videos' access urls.
+        """
+        video_ids = set(video_ids)
+        if not video_ids:
+            return
+        current_journal_uuids = dict(cls.objects.filter(id__in=video_ids).values_list('id', 'journal_uuid'))
+
+        journal_uuids = {}
+        for video_id, journal_uuid in JournalPage.videos.through.objects.filter(  # pylint: disable=no-member
+            video_id__in=video_ids,
+            journalpage__live=True,
+            journalpage__journal_about_page__journal__isnull=False
+        ).order_by('journalpage__path').values_list('video_id', 'journalpage__journal_about_page__journal__uuid'):
+            journal_uuids.setdefault(video_id, journal_uuid)
+
+        video_ids_by_journal_uuid = defaultdict(list)
+        for video_id, current_journal_uuid in current_journal_uuids.items():
+            if journal_uuids.get(video_id) != current_journal_uuid:
+                video_ids_by_journal_uuid[journal_uuids.get(video_id)].append(video_id)
+        if not video_ids_by_journal_uuid:
+            return
+
+        for journal_uuid, journal_video_ids in video_ids_by_journal_uuid.items():
+            cls.objects.filter(id__in=journal_video_ids).update(journal_uuid=journal_uuid)
+        changed_video_ids = [video_id for ids in video_ids_by_journal_uuid.values() for video_id in ids]
+        JournalPage.rerender_live_pages(JournalPage.objects.filter(videos__id__in=changed_video_ids).distinct())
+
     def __str__(self):
         return self.display_name
 
@@ -456,7 +863,7 @@ class Video(CollectionMember, index.Indexed, models.Model):
 from .blocks import (
     JournalRichTextBlock, JournalImageChooserBlock, JournalRawHTMLBlock, PDFBlock, XBlockVideoBlock,
     PDF_BLOCK_TYPE, VIDEO_BLOCK_TYPE, IMAGE_BLOCK_TYPE, RICH_TEXT_BLOCK_TYPE, RAW_HTML_BLOCK_TYPE,
-    STREAM_DATA_DOC_FIELD, STREAM_DATA_TYPE_FIELD)  # noqa
+    STREAM_DATA_DOC_FIELD, STREAM_DATA_TYPE_FIELD, prerender_stream, render_prerendered_stream)  # noqa
 
 
 class JournalRichTextField(RichTextField):
@@ -516,6 +923,9 @@ class JournalAboutPage(JournalPageMixin, Page):
         APIField('organization'),
     ]
 
+    # card image url resolved in bulk by prefetch_card_image_urls
+    _card_image_url = None
+
     @property
     def organization(self):
         return self.journal.organization.name if self.journal else None
@@ -639,9 +1049,27 @@ class JournalAboutPage(JournalPageMixin, Page):
         """
         if not self.card_image:
             return ''
+        if self._card_image_url is not None:
+            return self._card_image_url
 
         return get_image_url(self.site, self.card_image)
 
+    @classmethod
+    def prefetch_card_image_urls(cls, about_pages):
+        """
+        Resolve the card image urls of many about pages at once, with one query for the renditions of each
+        site, so listings don't query them page by page. Select the card images along with the pages.
+        """
+        pages_by_site = defaultdict(list)
+        for about_page in about_pages:
+            if about_page.card_image:
+                pages_by_site[about_page.site].append(about_page)
+
+        for site, site_pages in pages_by_site.items():
+            image_urls = get_image_urls(site, [about_page.card_image for about_page in site_pages])
+            for about_page, image_url in zip(site_pages, image_urls):
+                about_page._card_image_url = image_url  # pylint: disable=protected-access
+
     @property
     def card_image_absolute_url(self):
         if not self.card_image:
@@ -664,18 +1092,82 @@ class JournalAboutPage(JournalPageMixin, Page):
     @property
     def structure(self):
         """ Returns hierarchy of published journal pages as a dict """
+        # unsaved about pages (and previews of new ones, which get id 0) have no snapshot to
+        # read or to store, build their structure without persisting it
+        if not self.pk:
+            return self.build_structure()
+        return JournalStructure.get_for_about_page(self).structure
+
+    def get_bundle(self, snapshot=None):
+        """
+        Returns the structure, navigation and body payload of every live page of the journal in one dict.
+
+        Bodies are the payloads pre-rendered on publish, urls are filled in per request with
+        render_prerendered_stream. The bundle is cached until the journal's structure is rebuilt
+        or its pages are rendered again.
+        """
+        snapshot = snapshot or JournalStructure.get_for_about_page(self)
+        cache_key = get_cache_key(
+            resource='journal_bundle',
+            journal_about_page_id=self.id,
+            version=snapshot.version,
+            generation=get_page_response_cache_generation(self.id),
+        )
+        bundle = cache.get(cache_key)
+        if bundle is None:
+            bundle = self._build_bundle(snapshot)
+            cache.set(cache_key, bundle, JOURNAL_BUNDLE_CACHE_TIMEOUT)
+        return bundle
+
+    def _build_bundle(self, snapshot):
+        """ Builds the bundle of the journal from its structure snapshot and a single query for its live pages """
+        pages = []
+        for journal_page in JournalPage.objects.live().descendant_of(self).order_by('path'):
+            if not journal_page.has_current_rendered_body():
+                journal_page.prerender_body()
+            if journal_page.has_current_rendered_body():
+                body = journal_page.rendered_body['blocks']
+            else:
+                # bodies that can't be hashed aren't rendered on publish, serialize the live body instead
+                body = prerender_stream(journal_page.body)
+            page_id = str(journal_page.id)
+            previous_page_id, next_page_id = snapshot.navigation.get(page_id, [None, None])
+            pages.append({
+                'id': journal_page.id,
+                'title': journal_page.title,
+                'sub_title': journal_page.sub_title,
+                'author': journal_page.author,
+                'display_last_published_date': journal_page.display_last_published_date,
+                'last_published_at': journal_page.last_published_at,
+                'body': body,
+                'bread_crumbs': snapshot.bread_crumbs.get(page_id, []),
+                'previous_page_id': previous_page_id,
+                'next_page_id': next_page_id,
+            })
+
+        return {
+            'journal_about_page_id': self.id,
+            'journal_id': self.journal_id,
+            'version': snapshot.version,
+            'structure': snapshot.structure,
+            'pages': pages,
+        }
+
+    def build_structure(self, page_tree=None):
+        """ Builds the hierarchy of published journal pages from a single query over the page tree """
+        page_tree = page_tree or PageTree(self)
+        if not page_tree.has_live_descendants(self):
+            return []
+
         journal_structure = [
             struct for struct in
             (
-                journal_page.specific.get_nested_children(live_only=True)
-                for journal_page in self.get_children()
-                if self.get_descendants().live().count() > 0
+                page_tree.get_nested_children(journal_page, live_only=True)
+                for journal_page in page_tree.get_children(self)
             )
             if struct is not None
         ]
-        journal_structure = self.flatten_children(journal_structure)
-
-        return journal_structure
+        return self.flatten_children(journal_structure)
 
     def get_frontend_page_path(self):
         return '{about_page_id}/about'.format(about_page_id=self.id)
@@ -769,6 +1261,9 @@ class JournalPage(JournalPageMixin, Page):
         (VIDEO_BLOCK_TYPE, XBlockVideoBlock()),
     ], blank=True)
 
+    # API payload of body rendered on publish, {"body_hash": ..., "blocks": [...]}
+    rendered_body = JSONField(null=True, blank=True, editable=False)
+
     images = models.ManyToManyField(JournalImage)
     videos = models.ManyToManyField(Video)
     documents = models.ManyToManyField(JournalDocument)
@@ -792,12 +1287,66 @@ class JournalPage(JournalPageMixin, Page):
         APIField('display_last_published_date'),
         APIField('last_published_at'),
         APIField('author'),
-        APIField('body'),
+        APIField('body', serializer=PrerenderedBodyField()),
         APIField('bread_crumbs'),
         APIField('previous_page_id'),
         APIField('next_page_id'),
     ]
 
+    def prerender_body(self):
+        """
+        Render the API payload of body and store it on the page, called when the page is published
+        """
+        body_hash = self._get_body_hash()
+        if not body_hash:
+            return
+        self.rendered_body = {'body_hash': body_hash, 'blocks': prerender_stream(self.body)}
+        JournalPage.objects.filter(pk=self.pk).update(rendered_body=self.rendered_body)
+
+    @classmethod
+    def rerender_live_pages(cls, journal_pages):
+        """
+        Render again the bodies of the live pages among journal_pages and drop the cached responses and
+        bundles of their journals. To be called whenever something their rendered bodies embed changes,
+        including changes made with queryset updates, which send no signal.
+        """
+        journal_about_page_ids = set()
+        for journal_page in journal_pages.live():
+            journal_page.prerender_body()
+            journal_about_page_ids.add(journal_page.journal_about_page_id)
+        for journal_about_page_id in journal_about_page_ids - {None}:
+            invalidate_page_response_cache(journal_about_page_id)
+
+    @classmethod
+    def discard_rendered_bodies(cls, journal_pages):
+        """
+        Drop the rendered bodies of journal_pages and the cached responses and bundles of their journals,
+        so the pages are rendered on read until they are rendered again with rerender_live_pages.
+        """
+        journal_about_page_ids = set(journal_pages.values_list('journal_about_page_id', flat=True))
+        journal_pages.update(rendered_body=None)
+        for journal_about_page_id in journal_about_page_ids - {None}:
+            invalidate_page_response_cache(journal_about_page_id)
+
+    def has_current_rendered_body(self):
+        """ Whether the rendered body of the page was rendered from its current body """
+        body_hash = self._get_body_hash()
+        return bool(body_hash and self.rendered_body and self.rendered_body.get('body_hash') == body_hash)
+
+    def get_body_api_representation(self, request):
+        """
+        Returns the API payload of body, stitched from the payload rendered on publish when it matches body
+        """
+        if self.has_current_rendered_body():
+            return render_prerendered_stream(self.rendered_body['blocks'], request)
+        return self.body.stream_block.get_api_representation(self.body, context={'request': request})
+
+    def _get_body_hash(self):
+        """ Hash of the stored body, None if body was not loaded from storage (e.g. on preview) """
+        if not getattr(self.body, 'is_lazy', False):
+            return None
+        return make_md5_hash(json.dumps(self.body.stream_data, sort_keys=True))  # pylint: disable=no-member
+
     def update_related_objects(self, clear=False):
         """
         Update the relationship of related objects (docs, videos)
@@ -810,11 +1359,13 @@ class JournalPage(JournalPageMixin, Page):
             new_videos = set()
             new_images = set()
 
+        old_video_ids = set(self.videos.values_list('id', flat=True))
         self.documents.set(new_docs)  # pylint: disable=no-member
         self.videos.set(new_videos)  # pylint: disable=no-member
         self.images.set(new_images)  # pylint: disable=no-member
         self.journal_about_page = self._calculate_journal_about_page()
         self.save()
+        Video.update_journal_uuids(old_video_ids | {video.id for video in new_videos})
 
     def _get_related_objects(self, documents=True, videos=True, images=True):
         """
@@ -823,19 +1374,24 @@ class JournalPage(JournalPageMixin, Page):
         document set(), video set(), image set()
         each containg a list of corresponding objects models
         """
-        doc_set = set()
-        video_set = set()
-        image_set = set()
+        doc_ids = set()
+        video_ids = set()
+        image_ids = set()
 
         for data in self.body.stream_data:  # pylint: disable=no-member
             # TODO: search for images/docs embedded in RichText block as well
             block_type = data.get(STREAM_DATA_TYPE_FIELD, None)
             if documents and block_type == PDF_BLOCK_TYPE:
-                doc_set.add(JournalDocument.objects.get(id=data.get('value').get(STREAM_DATA_DOC_FIELD)))
+                doc_ids.add(data.get('value').get(STREAM_DATA_DOC_FIELD))
             elif videos and block_type == VIDEO_BLOCK_TYPE:
-                video_set.add(Video.objects.get(id=data.get('value').get('video')))
+                video_ids.add(data.get('value').get('video'))
             elif images and block_type == IMAGE_BLOCK_TYPE:
-                image_set.add(JournalImage.objects.get(id=data.get('value').get('image')))
+                image_ids.add(data.get('value').get('image'))
+
+        # one query per model whatever the number of blocks
+        doc_set = set(JournalDocument.objects.in_bulk(doc_ids).values()) if doc_ids else set()
+        video_set = set(Video.objects.in_bulk(video_ids).values()) if video_ids else set()
+        image_set = set(JournalImage.objects.in_bulk(image_ids).values()) if image_ids else set()
 
         return doc_set, video_set, image_set
 
@@ -843,13 +1399,66 @@ class JournalPage(JournalPageMixin, Page):
         """
         Get the ordered list of live ancestors to this page.
         """
-        if title_only:
-            ancestors = self.get_ancestors().live().filter(
-                content_type=self.content_type).values_list('title', flat=True)
-        else:
-            ancestors = self.get_ancestors().live().filter(content_type=self.content_type).values('title', 'id')
+        snapshot = self.structure_snapshot if self.id else None
+        bread_crumbs = snapshot.bread_crumbs.get(str(self.id)) if snapshot else None
+        if bread_crumbs is None:
+            bread_crumbs = self._get_bread_crumbs_from_paths([self])[self.id]
 
-        return ancestors
+        return self._format_bread_crumbs(bread_crumbs, title_only)
+
+    @classmethod
+    def get_bread_crumbs_for_pages(cls, pages, title_only=False):
+        """
+        Get the ordered list of live ancestors of each of the given pages as {page_id: bread_crumbs}.
+
+        Bread crumbs are read from the structure snapshots of the pages' journals with a single query,
+        pages missing from those are resolved with one query over the union of their ancestor paths.
+        """
+        journal_about_page_ids = {page.journal_about_page_id for page in pages if page.journal_about_page_id}
+        journal_bread_crumbs = {
+            snapshot.journal_about_page_id: snapshot.bread_crumbs
+            for snapshot in JournalStructure.objects.filter(
+                journal_about_page_id__in=journal_about_page_ids
+            ).only('journal_about_page_id', 'bread_crumbs')
+        } if journal_about_page_ids else {}
+
+        bread_crumbs = {}
+        missing_pages = []
+        for page in pages:
+            page_bread_crumbs = journal_bread_crumbs.get(page.journal_about_page_id, {}).get(str(page.id))
+            if page_bread_crumbs is None:
+                missing_pages.append(page)
+            else:
+                bread_crumbs[page.id] = page_bread_crumbs
+
+        if missing_pages:
+            bread_crumbs.update(cls._get_bread_crumbs_from_paths(missing_pages))
+
+        return {
+            page_id: cls._format_bread_crumbs(page_bread_crumbs, title_only)
+            for page_id, page_bread_crumbs in bread_crumbs.items()
+        }
+
+    @classmethod
+    def _get_bread_crumbs_from_paths(cls, pages):
+        """ Resolve bread crumbs of the given pages with one query over the union of their ancestor paths """
+        ancestor_paths = {page.id: get_ancestor_paths(page) for page in pages}
+        ancestors = {
+            ancestor['path']: {'title': ancestor['title'], 'id': ancestor['id']}
+            for ancestor in cls.objects.live().filter(
+                path__in=set(itertools.chain.from_iterable(ancestor_paths.values()))
+            ).values('path', 'title', 'id')
+        }
+        return {
+            page_id: [ancestors[path] for path in paths if path in ancestors]
+            for page_id, paths in ancestor_paths.items()
+        }
+
+    @staticmethod
+    def _format_bread_crumbs(bread_crumbs, title_only):
+        if title_only:
+            return [bread_crumb['title'] for bread_crumb in bread_crumbs]
+        return bread_crumbs
 
     def get_prev_page(self, live_only=True):
         """
@@ -862,8 +1471,8 @@ class JournalPage(JournalPageMixin, Page):
             return last_child if last_child else prev_sib
 
         prev_ancestor = self.get_ancestors().last()
-        if prev_ancestor and isinstance(prev_ancestor.specific, JournalPage):
-            if prev_ancestor.specific.live or not live_only:
+        if prev_ancestor and issubclass(prev_ancestor.specific_class, JournalPage):
+            if prev_ancestor.live or not live_only:
                 return prev_ancestor
             return prev_ancestor.specific.get_prev_page(live_only=live_only)
         return None
@@ -886,7 +1495,7 @@ class JournalPage(JournalPageMixin, Page):
 
         #  no direct children or siblings, now lets recursively check parent's siblings
         parent = self.get_parent()
-        if not isinstance(parent.specific, JournalPage):
+        if not issubclass(parent.specific_class, JournalPage):
             return None
         next_sib = parent.get_next_sibling()
 
@@ -902,14 +1511,42 @@ class JournalPage(JournalPageMixin, Page):
 
     @property
     def previous_page_id(self):
+        """ Id of the previous live page of the journal, from its navigation index when the page is part of it """
+        navigation = self.get_navigation()
+        if navigation:
+            return navigation[0]
         page = self.get_prev_page()
         return page.id if page else None
 
     @property
     def next_page_id(self):
+        """ Id of the next live page of the journal, from its navigation index when the page is part of it """
+        navigation = self.get_navigation()
+        if navigation:
+            return navigation[1]
         page = self.get_next_page()
         return page.id if page else None
 
+    def get_navigation(self):
+        """
+        Returns [previous_page_id, next_page_id] from the journal's precomputed navigation index,
+        or None if this page is not part of it yet (e.g. previewing a page that was never saved, or
+        a page outside of a journal)
+        """
+        snapshot = self.structure_snapshot if self.id else None
+        if snapshot is None:
+            return None
+        return snapshot.navigation.get(str(self.id))
+
+    @cached_property
+    def structure_snapshot(self):
+        """
+        Returns the structure snapshot of this page's journal, memoized on the instance,
+        or None if the page is not part of a journal
+        """
+        journal_about_page = self.get_journal_about_page()
+        return JournalStructure.get_for_about_page(journal_about_page) if journal_about_page else None
+
     def get_last_descendant(self, live_only=True):
         """
         get the last descendant of this page
@@ -921,7 +1558,7 @@ class JournalPage(JournalPageMixin, Page):
 
     def get_frontend_page_path(self):
         return '{about_page_id}/pages/{page_id}'.format(
-            about_page_id=self.get_journal_about_page().id,
+            about_page_id=self.journal_about_page_id or self.get_journal_about_page().id,
             page_id=self.id
         )
 
@@ -950,36 +1587,27 @@ class JournalPage(JournalPageMixin, Page):
         return journal_about.journal
 
     def get_journal_about_page(self):
-        """ Gets the journal about page field and calculates it if null """
-        if not self.journal_about_page:
+        """
+        Gets the journal about page field and calculates it if null.
+        The calculated value is not saved, use the backfill_journal_about_pages command to persist it.
+        """
+        if not self.journal_about_page_id:
             self.journal_about_page = self._calculate_journal_about_page()
-            # only save if page has been published otherwise saving causes
-            # page to be published which causes a problem for preview use-case
-            if self.page_ptr_id:
-                self.save()
 
         return self.journal_about_page
 
     def _calculate_journal_about_page(self):
-        """return about_page for journal"""
-        journal_about = None
-        parent = self.get_parent()
-        journal_about = parent.specific
-        while True:
-            if isinstance(parent.specific, JournalAboutPage):
-                journal_about = parent.specific
-                break
-            try:
-                parent = parent.get_parent()
-            except:  # noqa pylint: disable=bare-except
-                logging.error("Cannot find parent of {}".format(self))
-                break
+        """return about_page for journal, resolved from the treebeard path prefixes of this page in one query"""
+        journal_about = JournalAboutPage.objects.ancestor_of(self).first()
+        if not journal_about:
+            logger.error("Cannot find journal about page of {}".format(self))
         return journal_about
 
     def get_journal_structure(self):
         """ Returns the heirarchy of the journal as a dict """
+        snapshot = self.structure_snapshot
         structure = {
-            "journal_structure": self.get_journal_about_page().structure
+            "journal_structure": snapshot.structure if snapshot else []
         }
 
         return structure
@@ -987,6 +1615,109 @@ class JournalPage(JournalPageMixin, Page):
     def get_json_journal_structure(self):
         return json.dumps(self.get_journal_structure())
 
+    def move(self, target, pos=None):
+        """
+        Overridden to keep the journal_about_page reference and the structure snapshots
+        of the source and destination journals in sync with the page tree
+        """
+        old_about_page = self.get_journal_about_page()
+        super(JournalPage, self).move(target, pos=pos)
+
+        # treebeard doesn't update the in-memory instance on move so work with a fresh one
+        moved_page = JournalPage.objects.get(id=self.id)
+        new_about_page = moved_page._calculate_journal_about_page()  # pylint: disable=protected-access
+        moved_pages = JournalPage.objects.descendant_of(moved_page, inclusive=True)
+        moved_pages.update(journal_about_page=new_about_page)
+        page_videos = JournalPage.videos.through.objects  # pylint: disable=no-member
+        Video.update_journal_uuids(
+            page_videos.filter(journalpage__in=moved_pages).values_list('video_id', flat=True)
+        )
+
+        JournalStructure.rebuild(new_about_page)
+        if old_about_page and old_about_page.id != new_about_page.id:
+            JournalStructure.rebuild(old_about_page)
+
+
+class JournalStructure(TimeStampedModel):
+    """
+    Materialized snapshot of the published page hierarchy of a journal, of the
+    previous/next navigation between its pages and of their bread crumbs.
+
+    Building the hierarchy walks the whole page tree so it is only rebuilt when a page
+    in the journal is published, unpublished, moved or deleted, and served from here otherwise.
+    """
+    journal_about_page = models.OneToOneField(
+        JournalAboutPage,
+        related_name='structure_snapshot',
+        on_delete=models.CASCADE
+    )
+    version = models.PositiveIntegerField(default=1)
+    structure = JSONField(default=list)
+    # {page_id: [previous_live_page_id, next_live_page_id]}, keys are strings once stored as json
+    navigation = JSONField(default=dict)
+    # {page_id: [{"title", "id"}, ...]} live ancestors of every page, root first
+    bread_crumbs = JSONField(default=dict)
+
+    def __str__(self):
+        return '{about_page} (v{version})'.format(about_page=self.journal_about_page_id, version=self.version)
+
+    @classmethod
+    def get_for_about_page(cls, journal_about_page):
+        """
+        Returns the structure snapshot of the journal. A journal without a stored snapshot yet gets one built
+        in memory, reads never write, snapshots are stored on publish or by `./manage.py rebuild_journal_structures`
+        """
+        try:
+            return cls.objects.get(journal_about_page=journal_about_page)
+        except cls.DoesNotExist:
+            return cls.build(journal_about_page)
+
+    @classmethod
+    def build(cls, journal_about_page, snapshot=None):
+        """
+        Builds the structure, navigation and bread crumbs of the journal into the given snapshot, or into a new
+        unsaved one with version UNSAVED_STRUCTURE_VERSION so it never shares cache keys with a stored version
+        """
+        if snapshot is None:
+            snapshot = cls(journal_about_page=journal_about_page, version=UNSAVED_STRUCTURE_VERSION)
+        page_tree = PageTree(journal_about_page)
+        snapshot.structure = journal_about_page.build_structure(page_tree)
+        snapshot.navigation = {
+            str(page_id): neighbours for page_id, neighbours in page_tree.get_navigation().items()
+        }
+        snapshot.bread_crumbs = {
+            str(page_id): page_bread_crumbs
+            for page_id, page_bread_crumbs in page_tree.get_bread_crumbs().items()
+        }
+        return snapshot
+
+    @classmethod
+    def rebuild(cls, journal_about_page):
+        """
+        Rebuilds the structure snapshot of the journal and bumps its version. The snapshot is locked while
+        the tree is read, so concurrent publishes in the journal are built and versioned one after the other.
+        """
+        with transaction.atomic():
+            snapshot, created = cls.objects.select_for_update().get_or_create(journal_about_page=journal_about_page)
+            cls.build(journal_about_page, snapshot)
+            if not created:
+                snapshot.version = models.F('version') + 1
+            snapshot.save()
+
+        if not created:
+            snapshot.refresh_from_db(fields=['version'])
+        # navigation and bread crumbs of the journal's pages may have changed with the structure
+        invalidate_page_response_cache(journal_about_page.id)
+        return snapshot
+
+    @classmethod
+    def rebuild_for_page(cls, journal_page):
+        """ Rebuilds the structure snapshot of the journal the given page belongs to """
+        journal_about_page = journal_page.get_journal_about_page()
+        if journal_about_page:
+            return cls.rebuild(journal_about_page)
+        return None
+
 
 class WagtailModelManager(object):
     """
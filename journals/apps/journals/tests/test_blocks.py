@@ -2,10 +2,19 @@
 """
 Tests for custom blocks
 """
+import json
+import uuid
+
 import ddt
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from wagtail.wagtailcore.models import Site
 
-from journals.apps.journals.blocks import JournalRawHTMLBlock
+from journals.apps.core.tests.factories import DocumentFactory, ImageFactory, ImageRenditionFactory, JournalFactory
+from journals.apps.core.tests.utils import TEST_JOURNAL_STRUCTURE, JournalTestCase, create_journal_about_page_factory
+from journals.apps.journals.blocks import IMAGE_BLOCK_TYPE, PDF_BLOCK_TYPE, RICH_TEXT_BLOCK_TYPE, JournalRawHTMLBlock
+from journals.apps.journals.models import JournalPage
+from journals.apps.journals.utils import get_image_url
 
 
 @ddt.ddt
@@ -42,3 +51,120 @@ class TestJournalRawHTMLBlock(TestCase):
         Test value of this block is properly cleaned before being saved
         """
         self.assertEqual(self.block.value_for_form(given_value), transformed_value)
+
+
+class TestBulkChooserStructBlocks(TestCase):
+    """
+    Tests for resolving the chosen objects of StreamField blocks in bulk
+    """
+    def setUp(self):
+        super(TestBulkChooserStructBlocks, self).setUp()
+        self.site = Site.objects.first()
+        self.images = ImageFactory.create_batch(5)
+        self.documents = DocumentFactory.create_batch(5)
+        for image in self.images:
+            ImageRenditionFactory(image=image)
+
+        self.stream_data = [
+            {'type': IMAGE_BLOCK_TYPE, 'value': {'image': image.id, 'title': '', 'caption': ''}}
+            for image in self.images
+        ] + [
+            {'type': PDF_BLOCK_TYPE, 'value': {'doc': document.id, 'title': ''}}
+            for document in self.documents
+        ] + [
+            {'type': PDF_BLOCK_TYPE, 'value': {'doc': 0, 'title': 'deleted'}},
+        ]
+
+    def test_chosen_objects_loaded_in_bulk(self):
+        """
+        Images with their renditions and documents are loaded with one query each, whatever their count
+        """
+        body = JournalPage._meta.get_field('body').to_python(json.dumps(self.stream_data))
+
+        with self.assertNumQueries(3):
+            values = [child.value for child in body]
+
+        self.assertEqual([value['image'] for value in values[:5]], self.images)
+        self.assertEqual([value['doc'] for value in values[5:10]], self.documents)
+        self.assertIsNone(values[10]['doc'])
+
+        with self.assertNumQueries(0):
+            image_urls = [get_image_url(self.site, value['image']) for value in values[:5]]
+        self.assertTrue(all(url.endswith('original_images/{}.png'.format(image.id))
+                            for url, image in zip(image_urls, self.images)))
+
+
+class TestJournalRichTextBlock(JournalTestCase):
+    """
+    Tests for JournalRichTextBlock
+    """
+    def setUp(self):
+        super(TestJournalRichTextBlock, self).setUp()
+        self.pages = list(JournalPage.objects.all())
+        self.documents = DocumentFactory.create_batch(3)
+        self.stream_data = [
+            {
+                'type': RICH_TEXT_BLOCK_TYPE,
+                'value': ''.join(
+                    '<p><a linktype="page" id="{}">page</a></p>'.format(page.id) for page in self.pages
+                ) + '<p><a linktype="document" id="0">missing</a></p>'
+            },
+            {
+                'type': RICH_TEXT_BLOCK_TYPE,
+                'value': ''.join(
+                    '<p><a linktype="document" id="{}">doc</a></p>'.format(document.id) for document in self.documents
+                ) + '<p><a linktype="page" id="{}">about</a></p>'.format(self.journal_about_page.id)
+            },
+        ]
+        request = RequestFactory().get('/')
+        request.site = self.site
+        self.context = {'request': request}
+        cache.clear()
+
+    def _get_api_representations(self):
+        body = JournalPage._meta.get_field('body').to_python(json.dumps(self.stream_data))
+        return [child.block.get_api_representation(child.value, self.context) for child in body]
+
+    def test_links_resolved_in_bulk(self):
+        """
+        Links of all rich text blocks of a page are resolved together, with one query per model
+        """
+        # pages, their specific JournalPage and JournalAboutPage rows, then documents
+        with self.assertNumQueries(4):
+            page_html, document_html = self._get_api_representations()
+
+        for page in self.pages:
+            self.assertIn(
+                '<a href="{}/pages/{}">'.format(self.journal_about_page.id, page.id), page_html
+            )
+        self.assertIn('<a>missing</a>', page_html)
+        self.assertIn('<a href="{}/about">'.format(self.journal_about_page.id), document_html)
+        self.assertEqual(document_html.count('target="_blank"'), len(self.documents))
+
+    def test_expanded_html_follows_deleted_pages(self):
+        """
+        Links to a deleted page are emptied as soon as it is deleted
+        """
+        self._get_api_representations()
+        deleted_page = self.pages[-1]
+        deleted_page.delete()
+
+        page_html, _ = self._get_api_representations()
+        self.assertNotIn('/pages/{}">'.format(deleted_page.id), page_html)
+
+    def test_expanded_html_follows_moved_pages(self):
+        """
+        Links to a page that moved to another journal point into that journal once it moved
+        """
+        self._get_api_representations()
+        other_about_page = create_journal_about_page_factory(
+            journal=JournalFactory(organization=self.org, uuid=uuid.uuid4()),
+            journal_structure=TEST_JOURNAL_STRUCTURE,
+            root_page=self.site.root_page,
+            about_page_slug='other-journal-about-page-slug'
+        )
+        moved_page = self.pages[-1]
+        moved_page.move(other_about_page, pos='last-child')
+
+        page_html, _ = self._get_api_representations()
+        self.assertIn('<a href="{}/pages/{}">'.format(other_about_page.id, moved_page.id), page_html)
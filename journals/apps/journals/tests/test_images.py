@@ -0,0 +1,43 @@
+"""
+Test Cases for journal images and their renditions
+"""
+from django.test import TestCase
+from wagtail.wagtailcore.models import Site
+from wagtail.wagtailimages.tests.utils import get_test_image_file
+
+from journals.apps.core.tests.factories import ImageFactory, ImageRenditionFactory
+from journals.apps.journals.handlers import generate_image_renditions
+from journals.apps.journals.utils import get_image_url, get_image_urls
+
+
+class TestImageRenditions(TestCase):
+    """
+    Test Cases for generating and looking up image renditions
+    """
+
+    def setUp(self):
+        super(TestImageRenditions, self).setUp()
+        self.site = Site.objects.first()
+
+    def test_get_image_urls_single_query(self):
+        """ Urls of many images are resolved with one query for their renditions """
+        images = ImageFactory.create_batch(5)
+        for image in images:
+            ImageRenditionFactory(image=image)
+
+        with self.assertNumQueries(1):
+            urls = get_image_urls(self.site, images)
+        self.assertEqual(urls, [get_image_url(self.site, image) for image in images])
+        self.assertEqual(get_image_urls(self.site, []), [])
+
+    def test_generate_image_renditions(self):
+        """ Renditions served by the API are generated ahead of the requests, missing ones are generated on lookup """
+        image = ImageFactory(file=get_test_image_file())
+        generate_image_renditions(image.id)
+        self.assertTrue(image.renditions.filter(filter_spec='original').exists())
+
+        image.renditions.all().delete()
+        self.assertEqual(get_image_urls(self.site, [image]), [get_image_url(self.site, image)])
+        self.assertEqual(image.renditions.count(), 1)
+
+        generate_image_renditions(0)
@@ -1,11 +1,17 @@
 """
 Test Cases for journal about page
 """
-from django.test import TestCase
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
 from django.urls import reverse
+from mock import patch
 from wagtail.wagtailcore.models import Site
 
 from journals.apps.core.tests.factories import (
+    JournalAboutPageFactory,
     JournalFactory,
     OrganizationFactory,
     SiteConfigurationFactory,
@@ -13,8 +19,12 @@ from journals.apps.core.tests.factories import (
     USER_PASSWORD,
 )
 from journals.apps.core.tests.utils import (
+    TEST_JOURNAL_STRUCTURE,
+    JournalTestCase,
     create_journal_about_page_factory,
+    is_nested_json_equivalent,
 )
+from journals.apps.journals.models import UNSAVED_STRUCTURE_VERSION, JournalPage, JournalStructure
 from journals.apps.journals.handlers import (
     connect_page_signals_handlers,
     disconnect_page_signals_handlers,
@@ -172,3 +182,126 @@ class TestJournalAboutPageStructure(TestCase):
         self.journal_about_page.get_children()[0].get_children()[0].unpublish()
         self.journal_about_page.get_children()[0].get_children()[0].get_children()[0].save_revision().publish()
         self._assert_page_hierarchy()
+
+
+class TestJournalStructureSnapshot(JournalTestCase):
+    """ Test Cases for the materialized journal structure """
+
+    def _get_structure_titles(self, structure):
+        """ Returns the titles of all pages in the structure, depth first """
+        titles = []
+        for page in structure:
+            titles.append(page['title'])
+            titles.extend(self._get_structure_titles(page['children'] or []))
+        return titles
+
+    def test_structure_is_materialized(self):
+        """ Structure is stored on rebuild and served from the snapshot afterwards """
+        snapshot = JournalStructure.rebuild(self.journal_about_page)
+        self.assertEqual(snapshot.version, 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.journal_about_page.structure, snapshot.structure)
+
+        self.assertTrue(is_nested_json_equivalent(
+            {'structure': snapshot.structure},
+            {'structure': TEST_JOURNAL_STRUCTURE['structure']}
+        ))
+
+    def test_missing_structure_built_without_writing(self):
+        """ Reading the structure of a journal without a snapshot builds it in memory and stores nothing """
+        snapshot = JournalStructure.get_for_about_page(self.journal_about_page)
+        self.assertIsNone(snapshot.pk)
+        self.assertEqual(snapshot.version, UNSAVED_STRUCTURE_VERSION)
+        self.assertEqual(self.journal_about_page.structure, snapshot.structure)
+        self.assertFalse(JournalStructure.objects.filter(journal_about_page=self.journal_about_page).exists())
+
+    def test_rebuild_journal_structures_command(self):
+        """ The command stores the snapshots of journals without one and leaves the others alone """
+        call_command('rebuild_journal_structures', stdout=StringIO())
+        self.assertEqual(JournalStructure.objects.get(journal_about_page=self.journal_about_page).version, 1)
+
+        call_command('rebuild_journal_structures', stdout=StringIO())
+        self.assertEqual(JournalStructure.objects.get(journal_about_page=self.journal_about_page).version, 1)
+
+        call_command('rebuild_journal_structures', '--all', stdout=StringIO())
+        self.assertEqual(JournalStructure.objects.get(journal_about_page=self.journal_about_page).version, 2)
+
+    def test_structure_rebuilt_on_unpublish(self):
+        """ Unpublishing a page rebuilds the snapshot and bumps its version """
+        JournalStructure.rebuild(self.journal_about_page)
+        self.assertIn('test_page_2', self._get_structure_titles(self.journal_about_page.structure))
+
+        JournalPage.objects.get(title='test_page_2').unpublish()
+
+        snapshot = JournalStructure.objects.get(journal_about_page=self.journal_about_page)
+        self.assertEqual(snapshot.version, 2)
+        self.assertNotIn('test_page_2', self._get_structure_titles(self.journal_about_page.structure))
+
+    def test_structure_rebuilt_on_move(self):
+        """ Moving a page rebuilds the snapshot """
+        JournalStructure.rebuild(self.journal_about_page)
+        page = JournalPage.objects.get(title='test_page_2')
+        page.move(JournalPage.objects.get(title='test_page_3'), pos='last-child')
+
+        structure = self.journal_about_page.structure
+        self.assertEqual(JournalStructure.objects.get(journal_about_page=self.journal_about_page).version, 2)
+        self.assertEqual([page['title'] for page in structure], ['test_page_1', 'test_page_3'])
+        self.assertEqual(structure[1]['children'][-1]['title'], 'test_page_2')
+
+    @patch('journals.apps.journals.models.JournalAboutPage.update_related_objects')
+    def test_structure_rebuilt_on_about_page_publish(self, _mock_update_related_objects):
+        """ Publishing the about page with a new slug rebuilds the snapshot with the new urls of its pages """
+        JournalStructure.rebuild(self.journal_about_page)
+        self.journal_about_page.slug = 'renamed-journal'
+        self.journal_about_page.save_revision().publish()
+
+        snapshot = JournalStructure.objects.get(journal_about_page=self.journal_about_page)
+        self.assertEqual(snapshot.version, 2)
+        self.assertIn('/renamed-journal/', snapshot.structure[0]['url'])
+
+    def test_build_structure_single_query(self):
+        """ Building the structure costs one query regardless of the number of pages """
+        self.journal_about_page.build_structure()  # warm the site root paths cache used for page urls
+        with self.assertNumQueries(1):
+            self.journal_about_page.build_structure()
+
+    def test_build_structure_flattens_unpublished_pages(self):
+        """ Children of an unpublished page are lifted into its parent """
+        JournalPage.objects.get(title='test_page_1').unpublish()
+
+        structure = self.journal_about_page.build_structure()
+        self.assertEqual(
+            [page['title'] for page in structure],
+            ['test_page_1_a', 'test_page_1_b', 'test_page_2', 'test_page_3']
+        )
+        self.assertEqual(
+            [page['title'] for page in structure[0]['children']],
+            ['test_page_1_a_i', 'test_page_1_a_ii']
+        )
+        self.assertIsNone(structure[1]['children'])
+
+    def test_preview_of_new_page_does_not_store_snapshot(self):
+        """ Previewing an unsaved about page builds its structure without storing a snapshot """
+        SiteConfigurationFactory(site=self.site)
+        about_page = JournalAboutPageFactory.build(
+            journal=self.journal,
+            depth=self.site.root_page.depth + 1,
+            path=self.site.root_page.path + '9999',
+        )
+        request = RequestFactory().get('/')
+        request.user = UserFactory()
+        request.site = self.site
+        snapshot_count = JournalStructure.objects.count()
+
+        response = about_page.serve_preview(request, None)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(JournalStructure.objects.count(), snapshot_count)
+        self.assertFalse(JournalStructure.objects.filter(journal_about_page_id=0).exists())
+        self.assertEqual(cache.get(response.url.rsplit('/', 1)[-1])['structure'], [])
+
+    def test_unsaved_page_structure_is_not_stored(self):
+        """ Reading the structure of an unsaved about page doesn't write to the database """
+        about_page = JournalAboutPageFactory.build(journal=self.journal)
+        self.assertEqual(about_page.structure, [])
+        self.assertFalse(JournalStructure.objects.filter(journal_about_page=self.journal_about_page).exists())
@@ -1,18 +1,28 @@
 """ Test Cases for Journal Page """
+import json
+import uuid
+from io import StringIO
 
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
-from wagtail.wagtailcore.models import Site
+from wagtail.wagtailcore.models import Page, Site
 
 from journals.apps.core.tests.factories import (
     UserFactory,
     OrganizationFactory,
     JournalFactory,
     SiteConfigurationFactory,
+    VideoFactory,
     USER_PASSWORD
 )
-from journals.apps.journals.models import JournalPage
+from journals.apps.journals.blocks import VIDEO_BLOCK_TYPE
+from journals.apps.journals.journal_page_helper import PageTree, get_specific_pages
+from journals.apps.journals.models import JournalAboutPage, JournalPage, JournalStructure, Video
+from journals.apps.journals.utils import get_page_response_cache_generation
 from journals.apps.core.tests.utils import (
+    TEST_JOURNAL_STRUCTURE,
+    JournalTestCase,
     create_journal_about_page_factory,
 )
 from journals.apps.journals.handlers import (
@@ -366,3 +376,218 @@ class TestJournalPage(TestCase):
             self._get_previous_page(journal_grand_child_pages[0]).title,
             "test_page_1_child_1"
         )
+
+
+class TestJournalPageTree(JournalTestCase):
+    """
+    Test Cases for the position of Journal Pages in their journal: the precomputed previous/next navigation,
+    the bread crumbs, the about page owning them and their specific types.
+    """
+
+    def _get_neighbour_titles(self, title):
+        page = JournalPage.objects.get(title=title)
+        previous_page_id, next_page_id = page.previous_page_id, page.next_page_id
+        return (
+            JournalPage.objects.get(id=previous_page_id).title if previous_page_id else None,
+            JournalPage.objects.get(id=next_page_id).title if next_page_id else None,
+        )
+
+    def test_depth_first_navigation(self):
+        """ Navigation follows depth first order of the journal """
+        self.assertEqual(self._get_neighbour_titles('test_page_1'), (None, 'test_page_1_a'))
+        self.assertEqual(self._get_neighbour_titles('test_page_1_a_ii'), ('test_page_1_a_i', 'test_page_1_b'))
+        self.assertEqual(self._get_neighbour_titles('test_page_2'), ('test_page_1_b', 'test_page_3'))
+        self.assertEqual(self._get_neighbour_titles('test_page_3_b'), ('test_page_3_a', None))
+
+    def test_navigation_skips_unpublished_pages(self):
+        """ Unpublished pages are skipped once the navigation is rebuilt on unpublish """
+        JournalPage.objects.get(title='test_page_1_b').unpublish()
+
+        self.assertEqual(self._get_neighbour_titles('test_page_1_a_ii'), ('test_page_1_a_i', 'test_page_2'))
+        self.assertEqual(self._get_neighbour_titles('test_page_2'), ('test_page_1_a_ii', 'test_page_3'))
+        self.assertEqual(self._get_neighbour_titles('test_page_1_b'), ('test_page_1_a_ii', 'test_page_2'))
+
+    def test_navigation_includes_live_copies(self):
+        """ Pages copied and kept live from the admin are part of the rebuilt navigation """
+        JournalStructure.rebuild(self.journal_about_page)
+        admin = UserFactory(is_superuser=True, is_staff=True)
+        self.client.login(username=admin.username, password=USER_PASSWORD)
+        page = JournalPage.objects.get(title='test_page_2')
+        response = self.client.post(reverse('wagtailadmin_pages:copy', args=[page.id]), {
+            'new_title': 'test_page_2_copy',
+            'new_slug': 'test-page-2-copy',
+            'new_parent_page': self.journal_about_page.id,
+            'publish_copies': True,
+        })
+        self.assertEqual(response.status_code, 302)
+
+        self.assertTrue(JournalPage.objects.get(title='test_page_2_copy').live)
+        self.assertEqual(self._get_neighbour_titles('test_page_3_b'), ('test_page_3_a', 'test_page_2_copy'))
+        self.assertEqual(self._get_neighbour_titles('test_page_2_copy'), ('test_page_3_b', None))
+
+    def test_navigation_of_page_outside_journal(self):
+        """ Pages without an about page fall back to walking the page tree """
+        parent_page = self.site.root_page.add_child(instance=Page(title='not a journal', slug='not-a-journal'))
+        orphan_page = parent_page.add_child(instance=JournalPage(title='orphan page', slug='orphan-page'))
+        orphan_page = JournalPage.objects.get(id=orphan_page.id)
+        self.assertIsNone(orphan_page.structure_snapshot)
+        self.assertIsNone(orphan_page.get_navigation())
+
+        self.assertIsNone(orphan_page.previous_page_id)
+        self.assertIsNone(orphan_page.next_page_id)
+        self.assertEqual(orphan_page.get_bread_crumbs(), [])
+        self.assertEqual(orphan_page.get_journal_structure(), {'journal_structure': []})
+
+    def test_navigation_query_count(self):
+        """ Navigation costs a fixed number of queries whatever the tree shape """
+        JournalStructure.rebuild(self.journal_about_page)
+        page = JournalPage.objects.get(title='test_page_3_a')
+        # one query for the journal about page and one for the structure snapshot
+        with self.assertNumQueries(2):
+            self.assertIsNotNone(page.previous_page_id)
+            self.assertIsNotNone(page.next_page_id)
+
+    def _get_expected_bread_crumbs(self, pages):
+        return {
+            page.id: [ancestor.title for ancestor in JournalPage.objects.ancestor_of(page).live()]
+            for page in pages
+        }
+
+    def test_bread_crumbs(self):
+        """ Bread crumbs are the live ancestors of the page, root first """
+        page = JournalPage.objects.get(title='test_page_1_a_ii')
+        self.assertEqual(page.get_bread_crumbs(title_only=True), ['test_page_1', 'test_page_1_a'])
+        self.assertEqual(
+            [bread_crumb['id'] for bread_crumb in page.get_bread_crumbs()],
+            [page.get_parent().get_parent().id, page.get_parent().id]
+        )
+
+    def test_bread_crumbs_for_pages_single_query(self):
+        """ Bread crumbs of many pages are read from the structure snapshot at once """
+        JournalStructure.rebuild(self.journal_about_page)
+        pages = list(JournalPage.objects.all())
+        with self.assertNumQueries(1):
+            bread_crumbs = JournalPage.get_bread_crumbs_for_pages(pages, title_only=True)
+        self.assertEqual(bread_crumbs, self._get_expected_bread_crumbs(pages))
+
+    def test_bread_crumbs_for_pages_without_snapshot(self):
+        """ Without a snapshot bread crumbs come from a single query over the ancestor paths """
+        pages = list(JournalPage.objects.all())
+        JournalStructure.objects.all().delete()
+        with self.assertNumQueries(2):
+            bread_crumbs = JournalPage.get_bread_crumbs_for_pages(pages, title_only=True)
+        self.assertEqual(bread_crumbs, self._get_expected_bread_crumbs(pages))
+
+    def test_specific_pages_one_query_per_content_type(self):
+        """ Pages of a tree are upcast with one query per content type and keep their order """
+        pages = list(Page.objects.descendant_of(self.site.root_page).order_by('path'))
+        # warm the content type cache used by specific_class
+        for page in pages:
+            page.specific_class  # pylint: disable=pointless-statement
+
+        with self.assertNumQueries(2):
+            specific_pages = get_specific_pages(pages)
+
+        self.assertEqual([page.id for page in specific_pages], [page.id for page in pages])
+        self.assertIsInstance(specific_pages[0], JournalAboutPage)
+        self.assertTrue(all(isinstance(page, JournalPage) for page in specific_pages[1:]))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_specific_pages(specific_pages), specific_pages)
+
+    def test_specific_page_tree(self):
+        """ Page tree can hold the specific pages of the tree """
+        page_tree = PageTree(self.journal_about_page, specific=True)
+        self.assertEqual(len(page_tree.pages), self.journal_about_page.get_descendant_count())
+        self.assertTrue(all(isinstance(page, JournalPage) for page in page_tree.pages))
+        self.assertEqual(
+            [child.title for child in page_tree.get_children(self.journal_about_page)],
+            ['test_page_1', 'test_page_2', 'test_page_3']
+        )
+
+    def test_about_page_resolved_from_path_without_writes(self):
+        """ About page is resolved with a single read and nothing is saved """
+        JournalPage.objects.update(journal_about_page=None)
+        page = JournalPage.objects.get(title='test_page_1_a_ii')
+        with self.assertNumQueries(1):
+            self.assertEqual(page.get_journal_about_page().id, self.journal_about_page.id)
+        self.assertFalse(JournalPage.objects.filter(journal_about_page__isnull=False).exists())
+
+    def test_about_page_backfill_command(self):
+        """ Backfill command fills the reference for every page """
+        JournalPage.objects.update(journal_about_page=None)
+        call_command('backfill_journal_about_pages', stdout=StringIO())
+        self.assertFalse(JournalPage.objects.filter(journal_about_page__isnull=True).exists())
+        self.assertEqual(
+            JournalPage.objects.filter(journal_about_page=self.journal_about_page).count(),
+            self.journal_about_page.get_descendant_count()
+        )
+
+
+class TestVideoJournalUuids(JournalTestCase):
+    """
+    Test Cases for the journal uuid of videos shown on Journal Pages.
+    """
+
+    def setUp(self):
+        super(TestVideoJournalUuids, self).setUp()
+        self.page = JournalPage.objects.get(title='test_page_1_a_ii')
+        self.videos = [
+            VideoFactory(block_id=uuid.uuid4(), view_url='http://lms/xblock/block-v1') for _ in range(3)
+        ]
+        self.page.body = json.dumps([
+            {'type': VIDEO_BLOCK_TYPE, 'value': {'video': video.id, 'title': ''}} for video in self.videos
+        ])
+        self.page.save_revision().publish()
+
+    def test_journal_uuid_updated_on_publish(self):
+        """ Videos are mapped to their journal when a page showing them is published or unpublished """
+        for video in Video.objects.filter(id__in=[video.id for video in self.videos]):
+            self.assertEqual(video.journal_uuid, self.journal.uuid)
+
+        self.page.unpublish()
+        self.assertFalse(Video.objects.filter(journal_uuid__isnull=False).exists())
+
+    def test_pages_without_about_page_reference_skipped(self):
+        """ Live pages whose about page reference is not filled yet don't map videos to no journal """
+        first_page = JournalPage.objects.get(title='test_page_1')
+        first_page.videos.add(self.videos[0])
+        JournalPage.objects.filter(id=first_page.id).update(journal_about_page=None)
+        Video.objects.filter(id=self.videos[0].id).update(journal_uuid=None)
+
+        Video.update_journal_uuids([self.videos[0].id])
+        self.assertEqual(Video.objects.get(id=self.videos[0].id).journal_uuid, self.journal.uuid)
+
+    def test_pages_rerendered_on_journal_uuid_change(self):
+        """ Pages showing a video are rendered again and their cached responses dropped when its journal changes """
+        other_journal = JournalFactory(organization=self.org, uuid=uuid.uuid4(), name='other journal')
+        other_about_page = create_journal_about_page_factory(
+            journal=other_journal,
+            journal_structure=TEST_JOURNAL_STRUCTURE,
+            root_page=self.site.root_page,
+            about_page_slug='other-journal-about-page-slug'
+        )
+        other_page = JournalPage.objects.descendant_of(other_about_page).get(title='test_page_1_a_ii')
+        other_page.body = json.dumps([{'type': VIDEO_BLOCK_TYPE, 'value': {'video': self.videos[0].id, 'title': ''}}])
+        other_page.save_revision().publish()
+        other_page.refresh_from_db()
+        self.assertIn(str(self.journal.uuid), json.dumps(other_page.rendered_body))
+        generation = get_page_response_cache_generation(other_about_page.id)
+
+        self.page.unpublish()
+
+        other_page.refresh_from_db()
+        self.assertEqual(Video.objects.get(id=self.videos[0].id).journal_uuid, other_journal.uuid)
+        self.assertIn(str(other_journal.uuid), json.dumps(other_page.rendered_body))
+        self.assertNotIn(str(self.journal.uuid), json.dumps(other_page.rendered_body))
+        self.assertNotEqual(get_page_response_cache_generation(other_about_page.id), generation)
+
+    def test_view_access_urls_without_queries(self):
+        """ Video urls of a page body are built from the videos loaded with the body """
+        body = JournalPage.objects.get(id=self.page.id).body
+        with self.assertNumQueries(1):
+            urls = [child.value['video'].view_access_url for child in body]
+        self.assertEqual(
+            urls,
+            ['http://lms/journals/render_journal_block/block-v1?journal_uuid={}'.format(self.journal.uuid)] * 3
+        )
@@ -0,0 +1,179 @@
+"""
+Test Cases for journals views
+"""
+import datetime
+import shutil
+import tempfile
+import uuid
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from mock import patch
+from wagtail.wagtailcore.models import Site
+
+from journals.apps.core.models import User
+from journals.apps.core.tests.factories import (
+    JournalFactory,
+    OrganizationFactory,
+    SiteConfigurationFactory,
+    UserFactory,
+    USER_PASSWORD,
+)
+from journals.apps.journals.models import JournalAccess, UserImportJob
+from journals.apps.journals.utils import parse_csv
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class TestJournalAccessView(TestCase):
+    """
+    Test Cases for importing the users of a journal, uploads are stored in a temporary media root
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super(TestJournalAccessView, cls).tearDownClass()
+
+    def setUp(self):
+        super(TestJournalAccessView, self).setUp()
+        self.admin = UserFactory(is_staff=True, is_superuser=True)
+        self.journal = JournalFactory(organization=OrganizationFactory(site=Site.objects.first()), uuid=uuid.uuid4())
+        self.users = UserFactory.create_batch(3)
+        self.path = reverse('admin:import_users', args=[self.journal.id])
+        self.client.login(username=self.admin.username, password=USER_PASSWORD)
+
+    def test_parse_csv(self):
+        """ Usernames of the first column are streamed, blank lines are ignored """
+        csv_file = SimpleUploadedFile('users.csv', 'user_é,other\r\n\r\nuser_2\r\n'.encode('utf-8'))
+        self.assertEqual(list(parse_csv(csv_file)), ['user_é', 'user_2'])
+
+    def _post_csv(self, usernames):
+        return self.client.post(self.path, {
+            'expiration_date': (datetime.date.today() + datetime.timedelta(days=10)).isoformat(),
+            'bulk_upload_csv': SimpleUploadedFile('users.csv', '\n'.join(usernames).encode('utf-8')),
+        })
+
+    @override_settings(USER_IMPORT_WINDOW_SIZE=2)
+    @patch('journals.apps.journals.management.commands.process_user_import_jobs.close_old_connections')
+    @patch.object(User, 'account_api_client')
+    @patch.object(User, 'account_details')
+    def test_import_users_in_windows(self, mock_account_details, _mock_account_api_client, _mock_close_connections):
+        """ Imports are queued, then the worker checks, fetches from LMS and grants access a window at a time """
+        mock_account_details.side_effect = lambda api, usernames: [
+            {'username': username, 'email': '', 'is_active': True}
+            for username in usernames.split(',') if username.startswith('lms_')
+        ]
+        usernames = [user.username for user in self.users] + ['lms_user', 'unknown']
+        JournalAccess.objects.create(
+            user=self.users[0],
+            journal=self.journal,
+            expiration_date=datetime.date.today() + datetime.timedelta(days=10)
+        )
+
+        response = self._post_csv(usernames)
+
+        self.assertRedirects(response, self.path)
+        import_job = UserImportJob.objects.get(journal=self.journal)
+        self.assertEqual(import_job.status, UserImportJob.QUEUED)
+        self.assertEqual(import_job.created_by, self.admin)
+        csv_file_name = import_job.csv_file.name
+        self.assertTrue(csv_file_name.startswith('user_imports/'))
+        self.assertEqual(mock_account_details.call_count, 0)
+        self.assertEqual(JournalAccess.objects.filter(journal=self.journal).count(), 1)
+
+        call_command('process_user_import_jobs', '--once', stdout=StringIO())
+
+        import_job.refresh_from_db()
+        self.assertEqual(import_job.status, UserImportJob.SUCCEEDED)
+        self.assertEqual((import_job.added_count, import_job.existing_count, import_job.skipped_count), (3, 1, 1))
+        self.assertFalse(import_job.csv_file)
+        self.assertFalse(default_storage.exists(csv_file_name))
+        self.assertEqual(mock_account_details.call_count, 2)
+        self.assertEqual(
+            set(JournalAccess.objects.filter(journal=self.journal).values_list('user__username', flat=True)),
+            set(usernames[:4])
+        )
+
+    @patch('journals.apps.journals.management.commands.process_user_import_jobs.close_old_connections')
+    @patch('journals.apps.core.models.EdxRestApiClient')
+    def test_import_jobs_across_access_token_expiry(self, mock_client, _mock_close_connections):
+        """ A worker running several jobs fetches a new access token once the previous one expired """
+        SiteConfigurationFactory(site=Site.objects.first())
+        mock_client.get_oauth_access_token.side_effect = [
+            ('token-1', datetime.datetime.utcnow() + datetime.timedelta(hours=1)),
+            ('token-2', datetime.datetime.utcnow() + datetime.timedelta(hours=1)),
+        ]
+
+        def expire_access_token(username):  # pylint: disable=unused-argument
+            cache.clear()
+            return []
+
+        mock_client.return_value.accounts.return_value.get.side_effect = expire_access_token
+        self._post_csv(['lms_user_1'])
+        self._post_csv(['lms_user_2'])
+
+        call_command('process_user_import_jobs', '--once', stdout=StringIO())
+
+        self.assertEqual(
+            list(UserImportJob.objects.values_list('status', flat=True)),
+            [UserImportJob.SUCCEEDED, UserImportJob.SUCCEEDED]
+        )
+        self.assertEqual([call[1]['jwt'] for call in mock_client.call_args_list], ['token-1', 'token-2'])
+
+    def test_import_job_status(self):
+        """ The import page shows the latest job, whose progress is polled from the status view """
+        self._post_csv([self.users[0].username])
+        import_job = UserImportJob.claim_next()
+        self.assertEqual(import_job.status, UserImportJob.RUNNING)
+        self.assertIsNone(UserImportJob.claim_next())
+        status_path = reverse('admin:import_users_status', args=[self.journal.id, import_job.id])
+
+        response = self.client.get(self.path)
+        self.assertContains(response, status_path)
+
+        with patch.object(JournalAccess, 'bulk_create_journal_access', side_effect=ValueError('broken')):
+            import_job.run()
+        response = self.client.get(status_path)
+        self.assertEqual(response.json(), {
+            'id': import_job.id,
+            'status': UserImportJob.FAILED,
+            'status_display': 'Failed',
+            'is_finished': True,
+            'added_count': 0,
+            'skipped_count': 0,
+            'existing_count': 0,
+            'error': 'broken',
+        })
+        other_journal_path = reverse('admin:import_users_status', args=[self.journal.id + 1, import_job.id])
+        self.assertEqual(self.client.get(other_journal_path).status_code, 404)
+
+    @override_settings(USER_IMPORT_JOB_TIMEOUT=60)
+    def test_stale_running_job_fails(self):
+        """ Running jobs whose worker stopped making progress are failed and their file is deleted """
+        self._post_csv([self.users[0].username])
+        import_job = UserImportJob.claim_next()
+        csv_file_name = import_job.csv_file.name
+
+        self.assertIsNone(UserImportJob.claim_next())
+        import_job.refresh_from_db()
+        self.assertEqual(import_job.status, UserImportJob.RUNNING)
+
+        UserImportJob.objects.filter(id=import_job.id).update(
+            modified=timezone.now() - datetime.timedelta(seconds=61)
+        )
+        self.assertIsNone(UserImportJob.claim_next())
+
+        import_job.refresh_from_db()
+        self.assertEqual(import_job.status, UserImportJob.FAILED)
+        self.assertTrue(import_job.is_finished)
+        self.assertTrue(import_job.error)
+        self.assertFalse(import_job.csv_file)
+        self.assertFalse(default_storage.exists(csv_file_name))
@@ -1,18 +1,30 @@
 """
 Utility methods for journals
 """
+import codecs
 import csv
 import datetime
 import hashlib
+import itertools
 import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin, urlparse
 import six
 
+from django.core.cache import cache
+from django.db import connection, transaction
 from wagtail.wagtailadmin import messages
+from wagtail.wagtailimages.models import Filter
 
 logger = logging.getLogger(__name__)
 
 BLOCK_SPAN_ID_FORMATTER = '{block_type}-{block_id}'
+PAGE_RESPONSE_CACHE_GENERATION_KEY = 'page_response_cache_generation.{journal_about_page_id}'
+SITE_INFORMATION_GENERATION_KEY = 'site_information_generation.{site_id}'
+BACKGROUND_POOL_SIZE = 2
+
+_background_pool = None
 
 
 def make_md5_hash(value):
@@ -56,6 +68,48 @@ def get_cache_key(**kwargs):
     return hashlib.md5(key.encode('utf-8')).hexdigest()
 
 
+def _get_cache_generation(generation_key):
+    """
+    Get the generation stored under generation_key, starting a new one if there is none
+    """
+    generation = cache.get(generation_key)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        cache.set(generation_key, generation, None)
+    return generation
+
+
+def get_page_response_cache_generation(journal_about_page_id):
+    """
+    Get the current generation of the cached API responses of a journal's pages. It is part of
+    their cache keys, so starting a new generation drops every cached response of the journal.
+    """
+    return _get_cache_generation(
+        PAGE_RESPONSE_CACHE_GENERATION_KEY.format(journal_about_page_id=journal_about_page_id)
+    )
+
+
+def invalidate_page_response_cache(journal_about_page_id):
+    """
+    Start a new generation of the cached API responses of a journal's pages
+    """
+    cache.delete(PAGE_RESPONSE_CACHE_GENERATION_KEY.format(journal_about_page_id=journal_about_page_id))
+
+
+def get_site_information_generation(site_id):
+    """
+    Get the current generation of the branding and configuration of a site, it changes whenever either is saved
+    """
+    return _get_cache_generation(SITE_INFORMATION_GENERATION_KEY.format(site_id=site_id))
+
+
+def invalidate_site_information(site_id):
+    """
+    Start a new generation of the branding and configuration of a site
+    """
+    cache.delete(SITE_INFORMATION_GENERATION_KEY.format(site_id=site_id))
+
+
 def get_image_url(site, image, rendition='original'):
     """
     Get image url for a given rendition, defaults to 'original'
@@ -68,6 +122,44 @@ def get_image_url(site, image, rendition='original'):
     else:
         image_url = image.file.url
 
+    return _get_absolute_image_url(site, image_url)
+
+
+def get_image_urls(site, images, rendition='original'):
+    """
+    Get the urls of a rendition of many images at once, renditions are read with a single query
+    and the missing ones are generated as get_image_url would.
+    Args:
+        images: list of source Image objects
+        rendition: image rendition to return, defaults to 'original'
+    Returns:
+        list of the urls in the order of images
+    """
+    images = list(images)
+    if not images:
+        return []
+
+    rendition_filter = Filter(spec=rendition)
+    renditions = {
+        (image_rendition.image_id, image_rendition.focal_point_key): image_rendition
+        for image_rendition in images[0].get_rendition_model().objects.filter(
+            image_id__in={image.id for image in images},
+            filter_spec=rendition_filter.spec,
+        )
+    }
+    return [
+        _get_absolute_image_url(
+            site,
+            (
+                renditions.get((image.id, rendition_filter.get_cache_key(image))) or
+                image.get_rendition(rendition_filter)
+            ).file.url
+        )
+        for image in images
+    ]
+
+
+def _get_absolute_image_url(site, image_url):
     is_absolute_url = bool(urlparse(image_url).netloc)
     if is_absolute_url:
         return image_url
@@ -75,6 +167,33 @@ def get_image_url(site, image, rendition='original'):
         return urljoin(site.root_url, image_url)
 
 
+def _get_background_pool():
+    global _background_pool  # pylint: disable=global-statement
+    if _background_pool is None:
+        _background_pool = ThreadPoolExecutor(max_workers=BACKGROUND_POOL_SIZE)
+    return _background_pool
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Run func in the process' pool of background threads once the current transaction is committed,
+    right away when there is none. The database connection opened by the thread is closed when func returns.
+
+    This is best effort: tasks are only queued in memory, so they are lost if the process stops before
+    running them, and failed tasks are logged but not retried. Only hand off work whose result is also
+    built lazily on the next read, or whose readers get a correct fallback until it is done.
+    """
+    def run():
+        try:
+            func(*args, **kwargs)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception('Background task [%s] failed', func.__name__)
+        finally:
+            connection.close()
+
+    transaction.on_commit(lambda: _get_background_pool().submit(run))
+
+
 def add_messages(request, message_type, messages_list):
     """
         add messages of message type (success, error or warning etc) to render is template
@@ -97,15 +216,25 @@ def get_default_expiration_date(journal):
 
 def parse_csv(file_stream):
     """
-    Parse csv file and return a list containing all the usernames.
+    Parse csv file and yield the usernames of its first column. The file is decoded and parsed
+    line by line as it is read, so it is never held in memory as a whole.
     Arguments:
          file_stream: input file
     Yields:
-        list: CSV line parsed into a list.
+        str: username of a CSV line
     """
-    csv_file = csv.reader(file_stream.read().decode('utf-8').splitlines())
+    csv_file = csv.reader(codecs.iterdecode(file_stream, 'utf-8'))
     for row in csv_file:
-        yield row[0]
+        if row:
+            yield row[0]
+
+
+def chunked(iterable, size):
+    """
+    Yield lists of up to size consecutive items of iterable, consuming it a list at a time
+    """
+    iterator = iter(iterable)
+    return iter(lambda: list(itertools.islice(iterator, size)), [])
 
 
 def delete_block_references(instance, block_type):
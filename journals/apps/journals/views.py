@@ -1,21 +1,15 @@
 """
 Views for journals app
 """
-import logging
-
-from django.conf import settings
 from django.contrib import admin, messages
-from django.http import Http404
-from django.shortcuts import render
+from django.http import Http404, HttpResponseRedirect, JsonResponse
+from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
 from django.views.generic import View
 
-from journals.apps.core.models import User
 from journals.apps.journals.forms import UsersJournalAccessForm
-from journals.apps.journals.models import Journal, JournalAccess
-from journals.apps.journals.utils import get_default_expiration_date, parse_csv
-
-log = logging.getLogger(__name__)
+from journals.apps.journals.models import Journal, UserImportJob
+from journals.apps.journals.utils import get_default_expiration_date
 
 
 class JournalAccessView(View):
@@ -26,69 +20,23 @@ class JournalAccessView(View):
 
     def get_context(self, request, journal, journal_form=None):
         """
-        Returns the context for UsersJournalAccessForm.
+        Returns the context for UsersJournalAccessForm and the latest import job of the journal.
         """
+        import_job = journal.user_import_jobs.order_by('-id').first()
         context = {
             'url': reverse('admin:import_users', args=[journal.id]),
             'journal_access_form': journal_form if journal_form else UsersJournalAccessForm(
                 initial={'expiration_date': get_default_expiration_date(journal)}
             ),
             'opts': journal._meta,
+            'import_job': import_job,
+            'import_job_status_url': reverse(
+                'admin:import_users_status', args=[journal.id, import_job.id]
+            ) if import_job else None,
         }
         context.update(admin.site.each_context(request))
         return context
 
-    def get_or_create_journal_users(self, request, usernames):
-        """
-        Checks whether the usernames are valid (do exist in journal database)
-        if a username doesn't exist then fetch its data from LMS and create
-        a user in journal.apps.models.USER
-
-        Returns:
-            returns the set of valid usernames (exist in journal database)
-        """
-        start, offset = 0, settings.BATCH_SIZE_FOR_LMS_USER_API
-        existing_users = User.objects.filter(username__in=usernames).values_list('username', flat=True)
-        non_existing_users = list(set(usernames) - set(existing_users))
-        while start < len(non_existing_users):
-            users = set()
-            users_lms_data = User.account_details(request, ",".join(non_existing_users[start:start + offset]))
-            for user_data in users_lms_data:
-                username = user_data['username']
-                existing_users.add(username)
-                users.add(
-                    User(
-                        username=username,
-                        email=user_data.get('email', ""),
-                        is_active=user_data.get('is_active', "False")
-                    )
-                )
-                log.info("'{}' user has been added in journal.".format(username))
-            User.objects.bulk_create(list(users))
-            start = start + offset
-        return existing_users
-
-    def handle_users_import(self, request, journal, journal_access_form):
-        """
-        Give journal's access to given users.
-        """
-        usernames = set(
-            parse_csv(
-                journal_access_form.cleaned_data['bulk_upload_csv']
-            )
-        )
-        valid_usernames = self.get_or_create_journal_users(request, usernames)
-        JournalAccess.bulk_create_journal_access(
-            valid_usernames,
-            journal,
-            journal_access_form.cleaned_data['expiration_date']
-        )
-
-        skipped_usernames = usernames - set(valid_usernames)
-        if skipped_usernames:
-            log.warning("Following usernames have been skipped: [{}]".format(", ".join(list(skipped_usernames))))
-        return valid_usernames, skipped_usernames
-
     def _get_valid_journal(self, journal_id):
         journal = Journal.get_journal_by_id(journal_id=journal_id)
         if not journal:
@@ -111,12 +59,35 @@ class JournalAccessView(View):
             request.FILES
         )
         if journal_access_form.is_valid():
-            added_users, skipped_users = self.handle_users_import(request, journal, journal_access_form)
-            messages.success(
-                request,
-                "'{}' users added successfully and '{}' users skipped.".format(
-                    len(added_users),
-                    len(skipped_users)
-                )
+            UserImportJob.enqueue(
+                journal,
+                request.site,
+                journal_access_form.cleaned_data['bulk_upload_csv'],
+                journal_access_form.cleaned_data['expiration_date'],
+                created_by=request.user
             )
+            messages.success(request, "Users import has been queued, its progress is shown below.")
+            return HttpResponseRedirect(reverse('admin:import_users', args=[journal.id]))
         return render(request, self.template, self.get_context(request, journal, journal_form=journal_access_form))
+
+
+class UserImportJobStatusView(View):
+    """
+    View returning the progress of a journal's user import job, polled by the import users page.
+    """
+
+    def get(self, request, journal_id, job_id):
+        """
+        GET request method for UserImportJobStatusView.
+        """
+        import_job = get_object_or_404(UserImportJob, id=job_id, journal_id=journal_id)
+        return JsonResponse({
+            'id': import_job.id,
+            'status': import_job.status,
+            'status_display': import_job.get_status_display(),
+            'is_finished': import_job.is_finished,
+            'added_count': import_job.added_count,
+            'skipped_count': import_job.skipped_count,
+            'existing_count': import_job.existing_count,
+            'error': import_job.error,
+        })
@@ -22,12 +22,12 @@ from wagtail.wagtailadmin.edit_handlers import FieldPanel, MultiFieldPanel, Obje
 from wagtail.wagtailadmin.forms import SearchForm
 from wagtail.wagtailadmin.modal_workflow import render_modal_workflow
 from wagtail.wagtailadmin.navigation import get_explorable_root_page
-from wagtail.wagtailadmin.views.pages import move_choose_destination
-from wagtail.wagtailcore.models import Collection
+from wagtail.wagtailadmin.views.pages import move_choose_destination, set_page_position as wagtail_set_page_position
+from wagtail.wagtailcore.models import Collection, Page
 
 from journals.apps.journals.api_utils import get_discovery_journal
 from journals.apps.journals.wagtailadmin.forms import JournalEditForm, JournalCreateForm
-from journals.apps.journals.models import Journal, Organization
+from journals.apps.journals.models import Journal, JournalPage, JournalStructure, Organization
 from journals.apps.journals.permissions import video_permission_policy
 from journals.apps.journals.utils import add_messages
 
@@ -472,3 +472,20 @@ def move_page(request, page_to_move_id):
     """
     viewed_page = get_explorable_root_page(request.user)
     return move_choose_destination(request, page_to_move_id, viewed_page_id=viewed_page.id)
+
+
+def set_page_position(request, page_to_move_id):
+    """
+    Args:
+        request: http request object
+        page_to_move_id: id of the page to reorder
+
+    Wagtail reorders pages through the base Page model, which bypasses JournalPage.move,
+    so we rebuild the journal structure snapshot here once the page has been moved.
+    """
+    response = wagtail_set_page_position(request, page_to_move_id)
+    if request.method == 'POST':
+        page = Page.objects.get(id=page_to_move_id).specific
+        if isinstance(page, JournalPage):
+            JournalStructure.rebuild_for_page(page)
+    return response
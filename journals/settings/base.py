@@ -364,6 +364,19 @@ ALLOWED_DOCUMENT_TYPES = ['application/pdf']
 ALLOWED_DOCUMENT_FILE_EXTENSIONS = ['.pdf']
 
 BATCH_SIZE_FOR_LMS_USER_API = 50
+# batches of usernames are looked up in the LMS on this many threads, each request timing out after
+# LMS_USER_API_TIMEOUT seconds and being retried up to LMS_USER_API_RETRIES times, waiting
+# LMS_USER_API_RETRY_BACKOFF seconds before the first retry and twice as long before each next one
+LMS_USER_API_WORKERS = 4
+LMS_USER_API_TIMEOUT = 10
+LMS_USER_API_RETRIES = 2
+LMS_USER_API_RETRY_BACKOFF = 1
+# usernames of a user import are checked, created and granted access this many at a time
+USER_IMPORT_WINDOW_SIZE = 1000
+# seconds the process_user_import_jobs worker waits before checking an empty queue again
+USER_IMPORT_POLL_INTERVAL = 5
+# running user imports that saved no progress for this many seconds are failed, their worker was stopped
+USER_IMPORT_JOB_TIMEOUT = 60 * 60
 MAX_ELASTICSEARCH_UPLOAD_SIZE = 10000000  # maximum number of bytes per document that can be uploaded to elasticsearch
 
 ELASTICSEARCH_URL = 'http://127.0.0.1:9500'
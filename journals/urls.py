@@ -42,6 +42,7 @@ urlpatterns = auth_urlpatterns + [
     url(r'^auto_auth/$', core_views.AutoAuth.as_view(), name='auto_auth'),
     url(r'^health/$', core_views.health, name='health'),
     url(r'^cms/pages/(\d+)/move/$', custom_wagtailadmin_views.move_page, name='move_page'),
+    url(r'^cms/pages/(\d+)/set_position/$', custom_wagtailadmin_views.set_page_position, name='set_page_position'),
     # Wagtail paths
     url(r'^cms/login/$', core_views.wagtail_admin_access_check),
     url(r'^cms/logout/$', RedirectView.as_view(url='/logout')),